@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -41,15 +42,20 @@ INSTALLED_APPS = [
 
     'rest_framework',
     'knox',
-    'students'
+    'students',
+    'api',
 ]
 
 MIDDLEWARE = [
+    'api.querystats.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # after AuthenticationMiddleware: only staff may ask for a profile
+    'api.profiling.ProfilerMiddleware',
+    'api.replicas.ReplicaPinningMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -81,21 +87,144 @@ WSGI_APPLICATION = 'UniApi.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('UNIAPI_SQLITE_NAME', BASE_DIR / 'db.sqlite3'),
     }
 }
 
+# UNIAPI_SQLITE_PROFILE=production tunes SQLite for concurrent readers and
+# writers: WAL journaling, a busy timeout instead of immediate "database is
+# locked" errors, a larger page cache, mmap I/O and persistent connections.
+# The pragmas are applied to every new connection by UniApi.sqlite.
+SQLITE_PROFILE = os.environ.get('UNIAPI_SQLITE_PROFILE', 'default')
+SQLITE_PRAGMAS = {}
+
+if SQLITE_PROFILE == 'production':
+    DATABASES['default'].update({
+        'OPTIONS': {'timeout': 20},
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 20000,
+        'cache_size': -64000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+    }
+
+# Read replicas, e.g. UNIAPI_SQLITE_REPLICAS=/srv/replica1.sqlite3,/srv/replica2.sqlite3
+# Read-only API actions are routed to them by api.replicas.ReplicaRouter;
+# `manage.py sync_replicas` copies the primary into local replica files.
+DATABASE_REPLICAS = []
+for _index, _name in enumerate(
+    filter(None, os.environ.get('UNIAPI_SQLITE_REPLICAS', '').split(','))
+):
+    DATABASES[f'replica{_index + 1}'] = {
+        **DATABASES['default'],
+        'NAME': _name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{_index + 1}')
+
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+
+# seconds a student's reads stay on the primary after they wrote something
+REPLICA_PIN_SECONDS = 5
+
+# Per-request query instrumentation (api.querystats): the fraction of
+# requests measured (and given Server-Timing headers), and the thresholds
+# over which they are logged
+QUERY_STATS_SAMPLE_RATE = float(
+    os.environ.get('UNIAPI_QUERY_STATS_SAMPLE_RATE', '0.01')
+)
+QUERY_STATS_SLOW_MS = 500
+QUERY_STATS_MAX_QUERIES = 50
+# the same query template run this many times in one request
+QUERY_STATS_N_PLUS_ONE = 10
+
+# On-demand request profiles (api.profiling), kept as a ring buffer of the
+# newest PROFILER_MAX_PROFILES in PROFILER_DIR
+PROFILER_DIR = os.environ.get('UNIAPI_PROFILER_DIR', BASE_DIR / 'profiles')
+PROFILER_MAX_PROFILES = 100
+# fraction of all requests profiled without being asked to
+PROFILER_SAMPLE_RATE = float(os.environ.get('UNIAPI_PROFILER_SAMPLE_RATE', '0'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # state every worker process must agree on: the version stamps of the
+    # catalog and of per-student data (see api.cache.get_version). A
+    # FileBasedCache is shared by all processes on the host; a per-process
+    # cache would let one worker's writes go unseen by the others, which keep
+    # their stale ETags and cached data. Stamps are never culled, see
+    # api.cache_backends
+    'shared': {
+        'BACKEND': 'api.cache_backends.PersistentFileCache',
+        'LOCATION': os.environ.get(
+            'UNIAPI_SHARED_CACHE_DIR', BASE_DIR / '.cache' / 'shared'
+        ),
+        'TIMEOUT': None,
+    },
+    # students pinned to the primary after a write (api.replicas), shared for
+    # the same reason. Kept apart from the stamps so that culling expired
+    # pins never touches them
+    'pins': {
+        'BACKEND': 'api.cache_backends.ExpiringFileCache',
+        'LOCATION': os.environ.get(
+            'UNIAPI_PIN_CACHE_DIR', BASE_DIR / '.cache' / 'pins'
+        ),
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    # token digest -> AuthToken, see CachedTokenAuthentication. Per process;
+    # entries are checked against the user's auth stamp in 'shared', so a
+    # logout or deactivation reaches every worker at once
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'auth',
+        'TIMEOUT': 60,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    # student -> transcript with the stamps it was built under, see
+    # api.transcripts. Shared, so transcripts warmed by
+    # `manage.py publish_results` serve every worker
+    'transcripts': {
+        'BACKEND': 'api.cache_backends.PersistentFileCache',
+        'LOCATION': os.environ.get(
+            'UNIAPI_TRANSCRIPT_CACHE_DIR', BASE_DIR / '.cache' / 'transcripts'
+        ),
+        'TIMEOUT': 60 * 60 * 24,
+    },
+    # catalog list responses, keyed by the stamps in 'shared', so a change in
+    # any worker evicts them everywhere. LocMemCache keeps a copy per process
+    # and evicts least recently used entries past MAX_ENTRIES; a
+    # FileBasedCache would let workers share one copy instead
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'responses',
+        'TIMEOUT': 60 * 60,
+        'OPTIONS': {'MAX_ENTRIES': 5000, 'CULL_FREQUENCY': 10},
+    },
+}
+
 
 REST_FRAMEWORK = {
     'NON_FIELD_ERRORS_KEY':'error',
     'DEFAULT_AUTHENTICATION_CLASSES': [
         # 'rest_framework.authentication.BasicAuthentication',
         # 'rest_framework.authentication.SessionAuthentication',
-        'knox.auth.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
-    ]
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 AUTH_USER_MODEL = 'students.Student'
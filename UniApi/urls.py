@@ -16,8 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path , include
+from api.admin import profile_urls
 
 urlpatterns = [
+    path('admin/profiles/', include(profile_urls)),
     path('admin/', admin.site.urls),
     path('', include('api.urls'))
 ]
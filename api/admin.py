@@ -0,0 +1,37 @@
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+from django.urls import path
+from .profiling import list_profiles, profile_path
+
+# Request profiles written by api.profiling.ProfilerMiddleware, mounted under
+# /admin/profiles/ in UniApi/urls.py
+
+
+def profile_list(request):
+    order = "duration_ms" if request.GET.get("o") == "latency" else "created"
+    context = {
+        **admin.site.each_context(request),
+        "title": "Request profiles",
+        "order": order,
+        "profiles": list_profiles(order),
+    }
+    return TemplateResponse(request, "admin/api/profiles.html", context)
+
+
+def profile_download(request, profile_id):
+    try:
+        body = open(profile_path(profile_id), "rb")
+    except FileNotFoundError:
+        raise Http404("no such profile")
+    return FileResponse(body, as_attachment=True, filename=f"{profile_id}.prof")
+
+
+profile_urls = [
+    path("", admin.site.admin_view(profile_list), name="profiles"),
+    path(
+        "<int:profile_id>/",
+        admin.site.admin_view(profile_download),
+        name="profile-download",
+    ),
+]
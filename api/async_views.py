@@ -0,0 +1,145 @@
+"""
+Async versions of the hot student read endpoints, served under ``/async/``.
+
+They return the same bodies as their DRF counterparts in ``views.py`` but
+run as native Django async views, so under ASGI a request waiting on the
+database does not hold a worker thread. DRF views are sync-only, hence the
+small ``student_endpoint`` wrapper for authentication and error responses.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from students.models import Enrollment, Result, Student
+from students.timetable import atimetable
+
+from .authentication import AsyncTokenAuthentication
+from .cache import PROFILE_CACHE_TIMEOUT, aprofile_cache_key
+from .pagination import KeysetPagination
+from .replicas import allow_replica_reads
+from .serializers import (
+    EnrollmentExpandedSerializer,
+    EnrollmentSerializer,
+    ResultSerializer,
+    StudentMainDetailsSerializer,
+    StudentSecondaryDetailsSerializer,
+)
+from .views import _int_query_param
+
+authentication = AsyncTokenAuthentication()
+renderer = JSONRenderer()
+
+
+def _render(data, status_code=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        renderer.render(data),
+        content_type="application/json",
+        status=status_code,
+        headers=headers,
+    )
+
+
+def student_endpoint(view):
+    """Authenticate a GET with a knox token and render the view's data as JSON."""
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return _render(
+                {"detail": f'Method "{request.method}" not allowed.'},
+                status.HTTP_405_METHOD_NOT_ALLOWED,
+                {"Allow": "GET"},
+            )
+        drf_request = Request(request)
+        try:
+            user_auth = await authentication.aauthenticate(request)
+            if user_auth is None:
+                raise exceptions.NotAuthenticated()
+            drf_request.user, drf_request.auth = user_auth
+            data = await view(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            headers = None
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                headers = {
+                    "WWW-Authenticate": authentication.authenticate_header(request)
+                }
+            detail = exc.detail
+            if not isinstance(detail, dict | list):
+                detail = {"detail": detail}
+            return _render(detail, exc.status_code, headers)
+        except Http404:
+            return _render({"detail": "Not found."}, status.HTTP_404_NOT_FOUND)
+        return _render(data)
+
+    return wrapper
+
+
+async def _student_profile(serial_number, kind, serializer_class):
+    key = await aprofile_cache_key(kind, serial_number)
+    data = await cache.aget(key)
+    if data is None:
+        try:
+            student = await serializer_class().project(Student.objects.all()).aget(
+                pk=serial_number
+            )
+        except Student.DoesNotExist:
+            raise Http404
+        data = dict(serializer_class(student).data)
+        await cache.aset(key, data, PROFILE_CACHE_TIMEOUT)
+    return data
+
+
+async def _paginate(request, queryset, serializer_class):
+    # DRF's cursor pagination has no async API; run the page query in a thread
+    # the way Django's async ORM methods do
+    paginator = KeysetPagination()
+    page = await sync_to_async(paginator.paginate_queryset)(queryset, request)
+    return paginator.get_paginated_response(serializer_class(page, many=True).data).data
+
+
+@student_endpoint
+async def student_main_details(request):
+    return await _student_profile(
+        request.user.serial_number, "main", StudentMainDetailsSerializer
+    )
+
+
+@student_endpoint
+async def student_secondary_details(request):
+    return await _student_profile(
+        request.user.serial_number, "secondary", StudentSecondaryDetailsSerializer
+    )
+
+
+@student_endpoint
+async def student_timetable(request):
+    return await atimetable(request.user.serial_number)
+
+
+@student_endpoint
+async def results(request):
+    await sync_to_async(allow_replica_reads)(request)
+    queryset = Result.objects.filter(student=request.user.serial_number)
+    semester = _int_query_param(request, "semester")
+    if semester is not None:
+        queryset = queryset.filter(semester=semester)
+    course = _int_query_param(request, "course")
+    if course is not None:
+        queryset = queryset.filter(course=course)
+    return await _paginate(
+        request, queryset.select_related("course", "semester"), ResultSerializer
+    )
+
+
+@student_endpoint
+async def enrollments(request):
+    queryset = Enrollment.objects.filter(student=request.user.serial_number)
+    if request.query_params.get("expand") == "course":
+        return await _paginate(
+            request, queryset.select_related("course"), EnrollmentExpandedSerializer
+        )
+    return await _paginate(request, queryset, EnrollmentSerializer)
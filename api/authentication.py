@@ -0,0 +1,107 @@
+import binascii
+from hmac import compare_digest
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from knox.auth import TokenAuthentication
+from knox.crypto import hash_token
+from knox.models import get_token_model
+from knox.settings import CONSTANTS, knox_settings
+from rest_framework import exceptions
+from rest_framework.authentication import get_authorization_header
+
+from .cache import aauth_stamp, auth_cache, auth_stamp, auth_token_cache_key
+
+
+def _expired(auth_token):
+    return auth_token.expiry is not None and auth_token.expiry < timezone.now()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Knox token authentication with a cache from token digest to ``AuthToken``.
+
+    A cache hit skips the token-prefix query, the per-user token cleanup and
+    the user fetch. Entries are bounded and expire after the ``auth`` cache
+    TIMEOUT (60 seconds). The ``auth`` cache is per process, so each entry
+    also records the user's auth stamp from the shared cache, and a hit only
+    counts while that stamp is current. Deleting one of the user's tokens
+    (logout, logout-all) or saving the student bumps it, which revokes the
+    cached tokens in every worker at once.
+    """
+
+    def authenticate_credentials(self, token):
+        try:
+            digest = hash_token(token.decode("utf-8"))
+        except (TypeError, UnicodeDecodeError, binascii.Error):
+            raise exceptions.AuthenticationFailed(_("Invalid token."))
+        key = auth_token_cache_key(digest)
+        cached = auth_cache.get(key)
+        if cached is not None:
+            auth_token, stamp = cached
+            if not _expired(auth_token) and stamp == auth_stamp(auth_token.user_id):
+                if knox_settings.AUTO_REFRESH and auth_token.expiry:
+                    self.renew_token(auth_token)
+                return self.validate_user(auth_token)
+        user, auth_token = super().authenticate_credentials(token)
+        auth_cache.set(key, (auth_token, auth_stamp(user.pk)))
+        return user, auth_token
+
+
+class AsyncTokenAuthentication(CachedTokenAuthentication):
+    """
+    ``CachedTokenAuthentication`` for async views.
+
+    Cache hits never touch the database. Misses look the token up with the
+    async ORM; knox's expired-token cleanup and auto-refresh are writes that
+    only run on a miss or a refresh, and go through ``sync_to_async``.
+    """
+
+    async def aauthenticate(self, request):
+        auth = get_authorization_header(request).split()
+        prefix = self.authenticate_header(request).encode()
+        if not auth or auth[0].lower() != prefix.lower():
+            return None
+        if len(auth) == 1:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. No credentials provided.")
+            )
+        if len(auth) > 2:
+            raise exceptions.AuthenticationFailed(
+                _("Invalid token header. Token string should not contain spaces.")
+            )
+        return await self.aauthenticate_credentials(auth[1])
+
+    async def aauthenticate_credentials(self, token):
+        msg = _("Invalid token.")
+        try:
+            token = token.decode("utf-8")
+            digest = hash_token(token)
+        except (TypeError, UnicodeDecodeError, binascii.Error):
+            raise exceptions.AuthenticationFailed(msg)
+        key = auth_token_cache_key(digest)
+        cached = await auth_cache.aget(key)
+        auth_token = None
+        if cached is not None:
+            auth_token, stamp = cached
+            if _expired(auth_token) or stamp != await aauth_stamp(auth_token.user_id):
+                auth_token = None
+        if auth_token is None:
+            auth_token = await self._afind_token(token, digest)
+            stamp = await aauth_stamp(auth_token.user_id)
+            await auth_cache.aset(key, (auth_token, stamp))
+        if knox_settings.AUTO_REFRESH and auth_token.expiry:
+            await sync_to_async(self.renew_token)(auth_token)
+        return self.validate_user(auth_token)
+
+    async def _afind_token(self, token, digest):
+        auth_tokens = get_token_model().objects.filter(
+            token_key=token[: CONSTANTS.TOKEN_KEY_LENGTH]
+        ).select_related("user")
+        async for auth_token in auth_tokens:
+            if await sync_to_async(self._cleanup_token)(auth_token):
+                continue
+            if compare_digest(digest, auth_token.digest):
+                return auth_token
+        raise exceptions.AuthenticationFailed(_("Invalid token."))
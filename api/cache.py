@@ -0,0 +1,155 @@
+import hashlib
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+
+# version stamps of catalog resources and per-student data, shared by every
+# worker process. Data cached per process is keyed by its stamp, so a write
+# in any worker evicts it everywhere
+shared_cache = ConnectionProxy(caches, "shared")
+
+
+def _version_key(resource):
+    return f"version:{resource}"
+
+
+def get_version(resource):
+    """Return the ``(stamp, last_modified)`` pair of a resource."""
+    version = shared_cache.get(_version_key(resource))
+    if version is None:
+        version = bump_version(resource)
+    return version
+
+
+async def aget_version(resource):
+    version = await shared_cache.aget(_version_key(resource))
+    if version is None:
+        version = await sync_to_async(bump_version)(resource)
+    return version
+
+
+def bump_version(resource):
+    version = (uuid.uuid4().hex, int(time.time()))
+    shared_cache.set(_version_key(resource), version, None)
+    return version
+
+
+# seconds a serialized student profile stays cached
+PROFILE_CACHE_TIMEOUT = 60 * 15
+
+
+def _profile_resource(serial_number):
+    return f"profile:{serial_number}"
+
+
+def profile_cache_key(kind, serial_number):
+    stamp, _ = get_version(_profile_resource(serial_number))
+    return f"student-profile:{kind}:{serial_number}:{stamp}"
+
+
+async def aprofile_cache_key(kind, serial_number):
+    stamp, _ = await aget_version(_profile_resource(serial_number))
+    return f"student-profile:{kind}:{serial_number}:{stamp}"
+
+
+def invalidate_student_profile(serial_number):
+    bump_version(_profile_resource(serial_number))
+
+
+# token digest -> (knox AuthToken with its user, the user's auth stamp), see
+# CachedTokenAuthentication
+auth_cache = ConnectionProxy(caches, "auth")
+
+
+def auth_token_cache_key(digest):
+    return f"auth-token:{digest}"
+
+
+def _auth_resource(user_pk):
+    return f"auth:{user_pk}"
+
+
+def auth_stamp(user_pk):
+    stamp, _ = get_version(_auth_resource(user_pk))
+    return stamp
+
+
+async def aauth_stamp(user_pk):
+    stamp, _ = await aget_version(_auth_resource(user_pk))
+    return stamp
+
+
+def revoke_auth_tokens(user_pk):
+    """Stop every worker from accepting its cached tokens of the user."""
+    bump_version(_auth_resource(user_pk))
+
+
+# student -> (stamps, transcript), shared so that warming in a management
+# command serves every worker, see api.transcripts
+transcript_cache = ConnectionProxy(caches, "transcripts")
+TRANSCRIPT_CACHE_TIMEOUT = 60 * 60 * 24
+# bumped by changes to every transcript, e.g. a course renamed
+ALL_TRANSCRIPTS = "transcripts"
+
+
+def _transcript_resource(serial_number):
+    return f"transcript:{serial_number}"
+
+
+def transcript_cache_key(serial_number):
+    return f"transcript:{serial_number}"
+
+
+def transcript_stamps(serial_numbers):
+    """The stamps each student's cached transcript must carry to be current."""
+    generation, _ = get_version(ALL_TRANSCRIPTS)
+    return {
+        serial_number: (
+            generation,
+            get_version(_transcript_resource(serial_number))[0],
+        )
+        for serial_number in serial_numbers
+    }
+
+
+def invalidate_transcript(serial_number):
+    bump_version(_transcript_resource(serial_number))
+
+
+def invalidate_all_transcripts():
+    """Drop every cached transcript, e.g. after a course is renamed."""
+    bump_version(ALL_TRANSCRIPTS)
+
+
+# serialized catalog list responses, see CachedListMixin
+response_cache = ConnectionProxy(caches, "responses")
+_response_stats = defaultdict(lambda: {"hits": 0, "misses": 0})
+_response_stats_lock = threading.Lock()
+
+
+def response_cache_key(version, *parts):
+    digest = hashlib.md5(":".join(map(str, parts)).encode()).hexdigest()
+    return f"response:{version}:{digest}"
+
+
+def record_response_cache(endpoint, hit):
+    with _response_stats_lock:
+        _response_stats[endpoint]["hits" if hit else "misses"] += 1
+
+
+def response_cache_stats():
+    with _response_stats_lock:
+        return {
+            endpoint: {
+                **counts,
+                "hit_ratio": round(
+                    counts["hits"] / (counts["hits"] + counts["misses"]), 3
+                ),
+            }
+            for endpoint, counts in _response_stats.items()
+        }
@@ -0,0 +1,42 @@
+"""
+FileBasedCache variants for the caches every worker process shares.
+
+Django's FileBasedCache lists its whole directory on every ``set`` to decide
+whether to cull, and then deletes a random third of the files, whatever they
+hold. Neither suits state that must outlive the cull.
+"""
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class PersistentFileCache(FileBasedCache):
+    """
+    Never culls, for entries bounded by what they describe: one version stamp
+    per resource, one transcript per student. Losing a stamp would
+    invalidate everything keyed on it. ``set`` no longer lists the
+    directory, so it costs the same however many entries there are. Expired
+    entries are still deleted when read.
+    """
+
+    def _cull(self):
+        pass
+
+
+class ExpiringFileCache(FileBasedCache):
+    """
+    Deletes expired entries before culling, for short-lived entries that are
+    rarely read back, such as replica pins. The random cull only hits live
+    entries if ``MAX_ENTRIES`` of them are live at once.
+    """
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        for fname in filelist:
+            try:
+                with open(fname, "rb") as f:
+                    # deletes the file if it has expired
+                    self._is_expired(f)
+            except FileNotFoundError:
+                pass
+        super()._cull()
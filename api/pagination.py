@@ -0,0 +1,18 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over an indexed, unique column.
+
+    Pages are fetched with ``WHERE key > cursor ORDER BY key LIMIT n`` so a
+    deep page costs the same as the first one, unlike OFFSET pagination.
+    """
+
+    ordering = "id"
+    page_size_query_param = "page_size"
+    max_page_size = 500
+
+
+class StudentKeysetPagination(KeysetPagination):
+    ordering = "serial_number"
@@ -0,0 +1,132 @@
+"""
+On-demand request profiling.
+
+``ProfilerMiddleware`` runs a request under cProfile when it carries an
+``X-Profile`` header or a ``_profile`` query parameter from a staff member,
+or when it is picked by ``PROFILER_SAMPLE_RATE`` random sampling. The caller
+is resolved before the profiler starts, from the session or the knox token,
+so nobody else can make the server pay for profiling.
+
+Profiles go to ``PROFILER_DIR`` as a pstats dump plus a JSON file with the
+request line, status and latency. The directory is a ring buffer: after
+each save only the newest ``PROFILER_MAX_PROFILES`` profiles are kept. They
+are listed and downloaded from ``/admin/profiles/``.
+
+Async views are not profiled, as cProfile would only see the event loop.
+Neither is the consumption of streaming responses, which happens after the
+middleware returns.
+"""
+import cProfile
+import json
+import random
+import time
+from pathlib import Path
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import exceptions
+from .authentication import CachedTokenAuthentication
+
+HEADER = "HTTP_X_PROFILE"
+QUERY_PARAMETER = "_profile"
+
+
+def profile_dir():
+    return Path(settings.PROFILER_DIR)
+
+
+def profile_path(profile_id):
+    return profile_dir() / f"{profile_id:020d}.prof"
+
+
+def save_profile(profiler, request, response, seconds, trigger):
+    """Write one profile and drop the oldest beyond ``PROFILER_MAX_PROFILES``."""
+    directory = profile_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    profile_id = time.time_ns()
+    profiler.dump_stats(profile_path(profile_id))
+    user = getattr(request, "user", None)
+    metadata = {
+        "id": profile_id,
+        "created": timezone.now().isoformat(),
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status": response.status_code,
+        "duration_ms": round(seconds * 1000, 3),
+        "user": user.pk if user is not None and user.is_authenticated else None,
+        "trigger": trigger,
+    }
+    # written last: list_profiles() only sees profiles whose dump is complete
+    (directory / f"{profile_id:020d}.json").write_text(json.dumps(metadata))
+    for stale in sorted(directory.glob("*.json"))[: -settings.PROFILER_MAX_PROFILES]:
+        stale.with_suffix(".prof").unlink(missing_ok=True)
+        stale.unlink(missing_ok=True)
+    return profile_id
+
+
+def list_profiles(order="created"):
+    """Metadata of the stored profiles, newest or slowest first."""
+    profiles = []
+    for path in profile_dir().glob("*.json"):
+        try:
+            profiles.append(json.loads(path.read_text()))
+        except (FileNotFoundError, ValueError):
+            # pruned by another process while listing
+            continue
+    return sorted(profiles, key=lambda profile: profile[order], reverse=True)
+
+
+def is_staff(request):
+    """Whether the caller is staff, ahead of DRF's own authentication."""
+    user = request.user
+    if not user.is_authenticated:
+        try:
+            credentials = CachedTokenAuthentication().authenticate(request)
+        except exceptions.AuthenticationFailed:
+            return False
+        if credentials is None:
+            return False
+        user = credentials[0]
+    return user.is_staff
+
+
+def requested_trigger(request):
+    if HEADER in request.META or QUERY_PARAMETER in request.GET:
+        # anyone else's request runs unprofiled, and may still be sampled
+        if is_staff(request):
+            return "requested"
+    if random.random() < settings.PROFILER_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+class ProfilerMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trigger = requested_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        seconds = time.perf_counter() - started
+        profile_id = save_profile(profiler, request, response, seconds, trigger)
+        response["X-Profile-Id"] = str(profile_id)
+        return response
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
@@ -0,0 +1,160 @@
+"""
+Per-request query instrumentation.
+
+Every database connection gets an execute wrapper, installed when the
+connection is created, that records each query's SQL template and duration
+into the ``QueryStats`` of the request in flight. Requests that are not
+sampled leave no ``QueryStats`` in context, so their queries only pay for one
+context variable lookup.
+
+``QueryStatsMiddleware`` samples ``QUERY_STATS_SAMPLE_RATE`` of the requests
+and for those:
+
+* adds the query count, database time and duplicated query templates as
+  ``Server-Timing`` metrics,
+* logs requests slower than ``QUERY_STATS_SLOW_MS`` or with at least
+  ``QUERY_STATS_MAX_QUERIES`` queries,
+* logs every query template run ``QUERY_STATS_N_PLUS_ONE`` times or more as
+  a suspected N+1, with the view that ran it.
+
+Queries run while a streaming response is consumed happen after the
+middleware returns and are not counted.
+"""
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("query_stats", default=None)
+# "IN (%s, %s, %s)" and "IN (%s)" are the same query template
+_PLACEHOLDER_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.templates = Counter()
+
+    def add(self, sql, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.templates[_PLACEHOLDER_LIST.sub("%s, ...", sql)] += 1
+
+    def repeated(self, times):
+        """``(template, count)`` of the templates run at least ``times`` times."""
+        return [
+            (template, count)
+            for template, count in self.templates.most_common()
+            if count >= times
+        ]
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.add(sql, time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        # first, so execute_wrapper() blocks that pop the last wrapper keep it
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return request.path
+    func = getattr(match.func, "view_class", match.func)
+    return f"{func.__module__}.{func.__name__}"
+
+
+class QueryStatsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.QUERY_STATS_SAMPLE_RATE:
+            return self.get_response(request)
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, stats, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= settings.QUERY_STATS_SAMPLE_RATE:
+            return await self.get_response(request)
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.report(request, response, stats, time.perf_counter() - started)
+        return response
+
+    def report(self, request, response, stats, seconds):
+        duplicated = stats.repeated(2)
+        timings = [
+            f"db;dur={stats.seconds * 1000:.3f}",
+            f'db-queries;desc="{stats.count}"',
+            f'db-duplicates;desc="{len(duplicated)}"',
+            f"app;dur={seconds * 1000:.3f}",
+        ]
+        if response.has_header("Server-Timing"):
+            timings.insert(0, response["Server-Timing"])
+        response["Server-Timing"] = ", ".join(timings)
+
+        view = None
+        if (
+            seconds * 1000 >= settings.QUERY_STATS_SLOW_MS
+            or stats.count >= settings.QUERY_STATS_MAX_QUERIES
+        ):
+            view = view_name(request)
+            logger.warning(
+                "%s %s (%s): %d queries, %.1f ms in the database, %.1f ms total",
+                request.method,
+                request.get_full_path(),
+                view,
+                stats.count,
+                stats.seconds * 1000,
+                seconds * 1000,
+            )
+        for template, count in duplicated:
+            if count < settings.QUERY_STATS_N_PLUS_ONE:
+                break
+            logger.warning(
+                "suspected N+1 in %s: %d x %s",
+                view or view_name(request),
+                count,
+                template,
+            )
@@ -0,0 +1,119 @@
+"""
+Read-replica routing.
+
+Read-only viewset actions (``ReplicaReadMixin``) send their queries to one of
+``settings.DATABASE_REPLICAS``; everything else, including authentication and
+every write, uses ``default``. After a student writes, their reads stay on
+``default`` for ``REPLICA_PIN_SECONDS`` so they see their own changes despite
+replication lag.
+
+Replicas lag until the next ``sync_replicas``, which bumps the ``replicas``
+version stamp. Cached catalog lists and their ETags include
+``read_generation()``, so a list read from a lagging replica is never
+served as current to a primary reader, or after the next sync.
+"""
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.connection import ConnectionProxy
+from .cache import get_version
+
+_replica_reads = ContextVar("replica_reads", default=False)
+_wrote = ContextVar("wrote", default=False)
+
+READ_ACTIONS = ("list", "retrieve")
+# version resource bumped by ``manage.py sync_replicas``
+SYNC_RESOURCE = "replicas"
+# shared, as the student's next request may reach another worker
+pin_cache = ConnectionProxy(caches, "pins")
+
+
+def _pin_key(user_pk):
+    return f"replica-pin:{user_pk}"
+
+
+def pin_to_primary(user_pk):
+    pin_cache.set(_pin_key(user_pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_pk):
+    return pin_cache.get(_pin_key(user_pk), False)
+
+
+def allow_replica_reads(request):
+    """Route this request's remaining reads to a replica, unless pinned."""
+    if not settings.DATABASE_REPLICAS:
+        return
+    user = request.user
+    if user.is_authenticated and is_pinned(user.pk):
+        return
+    _replica_reads.set(True)
+
+
+def read_generation():
+    """
+    ``(tag, synced_at)`` of the data this request reads: ``("primary", 0)``,
+    or the replicas' version stamp, bumped by each ``sync_replicas``.
+    """
+    if _replica_reads.get() and settings.DATABASE_REPLICAS:
+        return get_version(SYNC_RESOURCE)
+    return ("primary", 0)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        _wrote.set(True)
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaPinningMiddleware:
+    """Reset routing state per request and pin students who wrote to primary."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        replica_token = _replica_reads.set(False)
+        wrote_token = _wrote.set(False)
+        try:
+            response = self.get_response(request)
+            if self._should_pin(request):
+                pin_to_primary(request.user.pk)
+            return response
+        finally:
+            _replica_reads.reset(replica_token)
+            _wrote.reset(wrote_token)
+
+    async def __acall__(self, request):
+        replica_token = _replica_reads.set(False)
+        wrote_token = _wrote.set(False)
+        try:
+            response = await self.get_response(request)
+            if self._should_pin(request):
+                await sync_to_async(pin_to_primary)(request.user.pk)
+            return response
+        finally:
+            _replica_reads.reset(replica_token)
+            _wrote.reset(wrote_token)
+
+    def _should_pin(self, request):
+        user = getattr(request, "user", None)
+        return _wrote.get() and user is not None and user.is_authenticated
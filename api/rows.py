@@ -0,0 +1,99 @@
+"""
+Read-only serialization straight from query rows.
+
+``RowSerializer`` compiles a ModelSerializer's readable fields once into
+``(name, lookup, converter)`` triples, then builds output dicts from
+``values()`` / ``values_list()`` rows: no model instances, no per-row
+serializer or ``get_attribute`` calls. The output is identical to the
+ModelSerializer's, so the two are interchangeable behind the same renderer.
+
+Only flat fields are supported: model fields, primary keys of foreign keys
+and dotted ``source`` paths through foreign keys. Many-to-many, nested and
+method fields raise ``ImproperlyConfigured`` when compiling.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.fields import ReadOnlyField
+
+# fields whose to_representation returns database values unchanged
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.IntegerField,
+    ReadOnlyField,
+)
+
+
+def _converter(field):
+    if isinstance(field, PASSTHROUGH_FIELDS):
+        return None
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if field.pk_field is not None:
+            return field.pk_field.to_representation
+        return None
+    if isinstance(
+        field,
+        (
+            serializers.BaseSerializer,
+            serializers.ManyRelatedField,
+            serializers.SerializerMethodField,
+            serializers.RelatedField,
+        ),
+    ) or field.source == "*":
+        raise ImproperlyConfigured(
+            f"{field.parent.__class__.__name__}.{field.field_name} cannot be "
+            "serialized from rows"
+        )
+    return field.to_representation
+
+
+class RowSerializer:
+    """
+    Serialize query rows the way ``serializer`` (a ModelSerializer instance,
+    possibly narrowed with sparse fieldsets) serializes model instances.
+    """
+
+    def __init__(self, serializer):
+        self.fields = [
+            (name, field.source.replace(".", "__"), _converter(field))
+            for name, field in serializer.fields.items()
+            if not field.write_only
+        ]
+        self.lookups = [lookup for _, lookup, _ in self.fields]
+
+    def values(self, queryset, *extra):
+        """``queryset`` as dict rows; ``extra`` adds lookups, e.g. cursor keys."""
+        return queryset.values(*dict.fromkeys(self.lookups + list(extra)))
+
+    def values_list(self, queryset):
+        return queryset.values_list(*self.lookups)
+
+    def from_dicts(self, rows):
+        fields = self.fields
+        return [
+            {
+                name: value if convert is None or value is None else convert(value)
+                for name, lookup, convert in fields
+                for value in (row[lookup],)
+            }
+            for row in rows
+        ]
+
+    def from_tuples(self, rows):
+        names = [name for name, _, _ in self.fields]
+        converters = [convert for _, _, convert in self.fields]
+        return [
+            {
+                name: value if convert is None or value is None else convert(value)
+                for name, convert, value in zip(names, converters, row)
+            }
+            for row in rows
+        ]
+
+
+def ordering_lookups(paginator):
+    """The columns a cursor paginator reads from each row to build cursors."""
+    ordering = paginator.ordering
+    if isinstance(ordering, str):
+        ordering = (ordering,)
+    return [field.lstrip("-") for field in ordering]
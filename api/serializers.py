@@ -3,6 +3,7 @@ from rest_framework.validators import ValidationError
 from students.models import (
     Student,
     Course,
+    CourseFull,
     Enrollment,
     Lecture,
     LectureTime,
@@ -12,12 +13,22 @@ from students.models import (
     Post,
 )
 from django.contrib.auth import authenticate
+from django.core.exceptions import FieldDoesNotExist
+from students.timetable import clashing_courses
 
 
 class CourseSerializer(serializers.ModelSerializer):
+    students_count = serializers.IntegerField(source="enrolled_count", read_only=True)
+
     class Meta:
         model = Course
-        fields = ("id", "name", "code", "teacher", "students")
+        fields = ("id", "name", "code", "teacher", "capacity", "students_count")
+
+
+class CourseStudentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Student
+        fields = ("serial_number", "first_name", "last_name")
 
 
 class EnrollmentSerializer(serializers.ModelSerializer):
@@ -30,12 +41,44 @@ class EnrollmentSerializer(serializers.ModelSerializer):
         course = Course.objects.get(pk=course_id)
         if course:
             if not course.students.filter(pk=attrs["student"].serial_number).exists():
+                if clashing_courses(attrs["student"], [course_id]):
+                    raise ValidationError(
+                        "the course clashes with the student's timetable"
+                    )
                 return super().validate(attrs)
             else:
                 raise ValidationError("the student is already enrolled in the course")
         else:
             raise ValidationError(f"there is no course with id{attrs[course]}")
 
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except CourseFull:
+            raise ValidationError("the course is full")
+
+
+class BulkEnrollmentSerializer(serializers.Serializer):
+    courses = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=50
+    )
+
+
+class EnrollmentExpandedSerializer(serializers.ModelSerializer):
+    course_name = serializers.CharField(source="course.name", read_only=True)
+    course_code = serializers.CharField(source="course.code", read_only=True)
+
+    class Meta:
+        model = Enrollment
+        fields = (
+            "id",
+            "student",
+            "course",
+            "date_enrolled",
+            "course_name",
+            "course_code",
+        )
+
 
 class LectureSerializer(serializers.ModelSerializer):
     class Meta:
@@ -49,98 +92,120 @@ class LectureTimeSerializer(serializers.ModelSerializer):
         fields = ("id", "start_time")
 
 
-class StudentSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Student
-        fields = "__all__"
-
-    def to_representation(self, instance):
-        # Call the superclass method to get the default representation
-        representation = super().to_representation(instance)
-
-        # Remove the fields you want to exclude from the response
-        representation.pop("groups", None)
-        representation.pop("user_permissions", None)
-        representation.pop("last_login", None)
-        representation.pop("is_superuser", None)
-        representation.pop("is_active", None)
-        representation.pop("is_staff", None)
-        # Return the modified representation
-        return representation
+class SparseFieldsetMixin:
+    """
+    Let a ModelSerializer render a subset of its fields.
+
+    ``fields`` and ``exclude`` (lists of field names, usually the
+    ``?fields=`` / ``?exclude=`` query parameters) narrow the serializer's
+    readable fields, and ``project()`` narrows a queryset to match: only the
+    columns behind those fields are loaded and only the requested
+    many-to-many relations are prefetched, so unrequested M2M fields are
+    never queried.
+    """
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sparse_fields = fields
+        self.sparse_exclude = exclude
+
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = set(self.sparse_fields or ()) | set(self.sparse_exclude or ())
+        unknown = requested - {
+            name for name, field in fields.items() if not field.write_only
+        }
+        if unknown:
+            raise ValidationError(
+                {"fields": f"unknown fields: {', '.join(sorted(unknown))}"}
+            )
+        if self.sparse_fields is not None:
+            fields = {
+                name: field
+                for name, field in fields.items()
+                if name in self.sparse_fields or field.write_only
+            }
+        for name in self.sparse_exclude or ():
+            del fields[name]
+        return fields
+
+    def project(self, queryset):
+        columns, relations = [], []
+        for field in self.fields.values():
+            if field.write_only or field.source == "*":
+                continue
+            name = field.source.split(".")[0]
+            try:
+                model_field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            (relations if model_field.many_to_many else columns).append(name)
+        return queryset.only(*columns).prefetch_related(*relations)
+
+
+STUDENT_HIDDEN_FIELDS = (
+    "groups",
+    "user_permissions",
+    "last_login",
+    "is_superuser",
+    "is_active",
+    "is_staff",
+)
 
 
-class StudentMainDetailsSerializer(serializers.ModelSerializer):
+class StudentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = Student
         fields = "__all__"
+        # still writable, but never rendered (nor loaded by project())
+        extra_kwargs = {name: {"write_only": True} for name in STUDENT_HIDDEN_FIELDS}
+
+
+class StudentMainDetailsSerializer(StudentSerializer):
+    class Meta(StudentSerializer.Meta):
+        fields = (
+            "serial_number",
+            "first_name",
+            "last_name",
+            "email",
+            "gender",
+            "date_of_birth",
+            "place_of_birth",
+            "country",
+            "living_place",
+            "living_city",
+            "arabic_first_name",
+            "arabic_second_name",
+            "arabic_third_name",
+            "arabic_last_name",
+            "marital_status",
+            "national_number",
+            "phone_number",
+            "credit_number",
+            "residence",
+            "family_book_number",
+            "family_paper_number",
+            "family_serial_number",
+            "section",
+            "division",
+            "current_semester",
+        )
 
-    def to_representation(self, instance):
-        # Call the superclass method to get the default representation
-        representation = super().to_representation(instance)
-
-        # Remove the fields you want to exclude from the response
-        representation.pop("password",None)
-        representation.pop("groups", None)
-        representation.pop("user_permissions", None)
-        representation.pop("last_login", None)
-        representation.pop("is_superuser", None)
-        representation.pop("is_active", None)
-        representation.pop("is_staff", None)
-        representation.pop("closest_family", None)
-        representation.pop("mother_name", None)
-        representation.pop("mothers_job", None)
-        representation.pop("other_to_call", None)
-        representation.pop("phone_number_email", None)
-        representation.pop("supervisor", None)
-
-        # Return the modified representation
-        return representation
-
-
-class StudentSecondaryDetailsSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = Student
-        fields = "__all__"
 
-    def to_representation(self, instance):
-        # Call the superclass method to get the default representation
-        representation = super().to_representation(instance)
-
-        # Remove the fields you want to exclude from the response
-        representation.pop("password",None)
-        representation.pop("groups", None)
-        representation.pop("user_permissions", None)
-        representation.pop("last_login", None)
-        representation.pop("is_superuser", None)
-        representation.pop("is_active", None)
-        representation.pop("is_staff", None)
-
-        representation.pop("serial_number", None)
-        representation.pop("first_name", None)
-        representation.pop("last_name", None)
-        representation.pop("gender", None)
-        representation.pop("email", None)
-        representation.pop("date_of_birth", None)
-
-        representation.pop("place_of_birth", None)
-        representation.pop("country", None)
-        representation.pop("living_place", None)
-        representation.pop("living_city", None)
-        representation.pop("arabic_first_name", None)
-        representation.pop("arabic_second_name", None)
-
-        representation.pop("arabic_third_name", None)
-        representation.pop("arabic_last_name", None)
-        representation.pop("marital_status", None)
-        representation.pop("national_number", None)
-        representation.pop("phone_number", None)
-        representation.pop("credit_number", None)
-
-        representation.pop("residence", None)
-        representation.pop("section", None)
-        representation.pop("division", None)
-        # Return the modified representation
-        return representation
+class StudentSecondaryDetailsSerializer(StudentSerializer):
+    class Meta(StudentSerializer.Meta):
+        fields = (
+            "family_book_number",
+            "family_paper_number",
+            "family_serial_number",
+            "closest_family",
+            "mother_name",
+            "mothers_job",
+            "other_to_call",
+            "phone_number_email",
+            "current_semester",
+            "supervisor",
+        )
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -185,6 +250,11 @@ class SemesterSerializer(serializers.ModelSerializer):
 
 
 class ResultSerializer(serializers.ModelSerializer):
+    course_name = serializers.CharField(source="course.name", read_only=True)
+    course_code = serializers.CharField(source="course.code", read_only=True)
+    semester_season = serializers.CharField(source="semester.season", read_only=True)
+    semester_year = serializers.IntegerField(source="semester.year", read_only=True)
+
     class Meta:
         model = Result
         fields = [
@@ -195,13 +265,33 @@ class ResultSerializer(serializers.ModelSerializer):
             "semifinal_degree",
             "final_degree",
             "total_degree",
+            "course_name",
+            "course_code",
+            "semester_season",
+            "semester_year",
         ]
 
 
+SEMESTER_RESULT_AGGREGATES = (
+    "total_degree",
+    "subjects_count",
+    "total_unites",
+    "weighted_degree",
+)
+
+
 class SemesterResultSerializer(serializers.ModelSerializer):
+    average_degree = serializers.FloatField(read_only=True)
+    gpa = serializers.FloatField(read_only=True)
+
     class Meta:
         model = SemesterResult
         fields = '__all__'
+        read_only_fields = SEMESTER_RESULT_AGGREGATES
+
+
+class SemesterResultExpandedSerializer(SemesterResultSerializer):
+    subjects = ResultSerializer(many=True, read_only=True)
 
 class PostSerializer(serializers.ModelSerializer):
     class Meta:
@@ -0,0 +1,109 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from knox.models import AuthToken
+from students.models import (
+    Course,
+    Enrollment,
+    Lecture,
+    LectureTime,
+    Post,
+    Result,
+    Semester,
+    SemesterResult,
+    Student,
+)
+from students.signals import results_published
+from .cache import (
+    bump_version,
+    invalidate_all_transcripts,
+    invalidate_student_profile,
+    invalidate_transcript,
+    revoke_auth_tokens,
+)
+from .transcripts import warm_transcripts
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def student_changed(sender, instance, **kwargs):
+    invalidate_student_profile(instance.pk)
+
+
+@receiver(post_save, sender=Student)
+def student_saved(sender, instance, created, **kwargs):
+    # cached tokens carry a copy of the student, is_active included
+    if not created:
+        revoke_auth_tokens(instance.pk)
+
+
+@receiver(post_delete, sender=AuthToken)
+def auth_token_deleted(sender, instance, **kwargs):
+    revoke_auth_tokens(instance.user_id)
+
+
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+@receiver(post_save, sender=SemesterResult)
+@receiver(post_delete, sender=SemesterResult)
+def transcript_changed(sender, instance, **kwargs):
+    invalidate_transcript(instance.student_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Semester)
+@receiver(post_delete, sender=Semester)
+def transcript_labels_changed(sender, instance, **kwargs):
+    invalidate_all_transcripts()
+
+
+@receiver(post_save, sender=Lecture)
+@receiver(post_delete, sender=Lecture)
+def transcript_units_changed(sender, instance, **kwargs):
+    # course units weigh the GPA, and the rebuild in students.signals changes
+    # it with a plain UPDATE that sends no signal
+    invalidate_all_transcripts()
+
+
+@receiver(results_published)
+def results_were_published(sender, semester_ids, **kwargs):
+    return warm_transcripts(semester_ids)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def course_catalog_changed(sender, **kwargs):
+    # the catalog carries an enrollment count per course
+    bump_version("course")
+
+
+@receiver(post_save, sender=Lecture)
+@receiver(post_delete, sender=Lecture)
+def lecture_catalog_changed(sender, instance, **kwargs):
+    bump_version("lecture")
+    # lecture lists are cached per ?course=, so only the affected courses go;
+    # students.signals.lecture_moving records the course a lecture moved from
+    previous_course_id = getattr(instance, "_previous_course_id", None)
+    for course_id in {instance.course_id, previous_course_id} - {None}:
+        bump_version(f"lecture:{course_id}")
+
+
+@receiver(post_save, sender=LectureTime)
+@receiver(post_delete, sender=LectureTime)
+def lecture_time_catalog_changed(sender, **kwargs):
+    bump_version("lecture-time")
+
+
+@receiver(post_save, sender=Semester)
+@receiver(post_delete, sender=Semester)
+@receiver(m2m_changed, sender=Semester.students.through)
+def semester_catalog_changed(sender, **kwargs):
+    bump_version("semester")
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_catalog_changed(sender, **kwargs):
+    bump_version("post")
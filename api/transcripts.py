@@ -0,0 +1,129 @@
+"""
+Student transcripts: every semester with its results, course names and totals.
+
+All transcripts are built from a single query over ``Result`` joined to its
+course and semester, with the maintained ``SemesterResult`` totals pulled in
+as correlated subqueries. Built transcripts are cached per student in the
+shared ``transcripts`` cache, along with the stamps they were built under:
+a cached transcript only counts while they are current.
+"""
+from itertools import groupby
+
+from django.db.models import OuterRef, Subquery
+from students.models import Result, SemesterResult
+from .cache import (
+    TRANSCRIPT_CACHE_TIMEOUT,
+    transcript_cache,
+    transcript_cache_key,
+    transcript_stamps,
+)
+
+RESULT_FIELDS = (
+    "course",
+    "course__name",
+    "course__code",
+    "work_degree",
+    "semifinal_degree",
+    "final_degree",
+    "total_degree",
+)
+SEMESTER_TOTALS = ("total_degree", "subjects_count", "total_unites", "weighted_degree")
+
+
+def _transcript_rows(results):
+    sem_results = SemesterResult.objects.filter(
+        student=OuterRef("student"), semester=OuterRef("semester")
+    )
+    return (
+        results.annotate(
+            **{
+                f"semester_{field}": Subquery(sem_results.values(field)[:1])
+                for field in SEMESTER_TOTALS
+            }
+        )
+        .order_by("student", "semester__year", "-semester__season", "semester", "id")
+        .values(
+            "student",
+            "semester",
+            "semester__season",
+            "semester__year",
+            *RESULT_FIELDS,
+            *(f"semester_{field}" for field in SEMESTER_TOTALS),
+        )
+    )
+
+
+def _semester_entry(rows):
+    first = rows[0]
+    totals = SemesterResult(
+        **{field: first[f"semester_{field}"] or 0 for field in SEMESTER_TOTALS}
+    )
+    has_totals = first["semester_total_degree"] is not None
+    return {
+        "semester": first["semester"],
+        "season": first["semester__season"],
+        "year": first["semester__year"],
+        "total_degree": totals.total_degree if has_totals else None,
+        "subjects_count": totals.subjects_count if has_totals else None,
+        "average_degree": totals.average_degree,
+        "gpa": totals.gpa,
+        "results": [
+            {
+                "course": row["course"],
+                "course_name": row["course__name"],
+                "course_code": row["course__code"],
+                "work_degree": row["work_degree"],
+                "semifinal_degree": row["semifinal_degree"],
+                "final_degree": row["final_degree"],
+                "total_degree": row["total_degree"],
+            }
+            for row in rows
+        ],
+    }
+
+
+def build_transcripts(results):
+    """Map student serial number to transcript for every student in ``results``."""
+    transcripts = {}
+    for serial_number, student_rows in groupby(
+        _transcript_rows(results).iterator(), key=lambda row: row["student"]
+    ):
+        transcripts[serial_number] = {
+            "student": serial_number,
+            "semesters": [
+                _semester_entry(list(rows))
+                for _, rows in groupby(student_rows, key=lambda row: row["semester"])
+            ],
+        }
+    return transcripts
+
+
+def get_transcript(serial_number):
+    key = transcript_cache_key(serial_number)
+    # read before the results, so a change in between leaves the entry stale
+    stamps = transcript_stamps([serial_number])[serial_number]
+    cached = transcript_cache.get(key)
+    if cached is not None and cached[0] == stamps:
+        return cached[1]
+    transcript = build_transcripts(Result.objects.filter(student=serial_number)).get(
+        serial_number, {"student": serial_number, "semesters": []}
+    )
+    transcript_cache.set(key, (stamps, transcript), TRANSCRIPT_CACHE_TIMEOUT)
+    return transcript
+
+
+def warm_transcripts(semester_ids):
+    """Rebuild and cache the transcript of every student with results in them."""
+    students = Result.objects.filter(semester__in=semester_ids).values("student")
+    stamps = transcript_stamps(students.values_list("student", flat=True).distinct())
+    transcripts = build_transcripts(Result.objects.filter(student__in=students))
+    transcript_cache.set_many(
+        {
+            transcript_cache_key(serial_number): (stamps[serial_number], transcript)
+            for serial_number, transcript in transcripts.items()
+            # a student whose first result came in since the stamps were read
+            if serial_number in stamps
+        },
+        TRANSCRIPT_CACHE_TIMEOUT,
+    )
+    return len(transcripts)
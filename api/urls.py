@@ -1,18 +1,25 @@
 from django.urls import path, include
 from rest_framework import routers
 from knox import views as knox_views
-from . import views
+from . import async_views, views
 
 app_name = "students"
 
 urlpatterns = [
     path("student/main/", views.student_main_details),
     path("student/secondary/", views.student_secondary_details),
+    path("student/transcript/", views.student_transcript),
+    path("student/timetable/", views.student_timetable),
     path("register/", views.RegisterAPI.as_view(), name="register"),
     path("login/", views.LoginView.as_view(), name="login"),
     path("logout/", knox_views.LogoutView.as_view(), name="logout"),
     path("logoutall/", knox_views.LogoutAllView.as_view(), name="logoutall"),
     path("courses/", views.CourseViewSet.as_view({"get": "list"}), name="courses"),
+    path(
+        "courses/<int:pk>/students/",
+        views.CourseViewSet.as_view({"get": "students"}),
+        name="course students",
+    ),
     path(
         "enrollment/",
         views.EnrollmentViewSet.as_view({"get": "list"}),
@@ -28,12 +35,26 @@ urlpatterns = [
         views.EnrollmentViewSet.as_view({"post": "create"}),
         name="signIn course",
     ),
+    path(
+        "enroll/bulk/",
+        views.EnrollmentViewSet.as_view({"post": "bulk"}),
+        name="bulk enroll",
+    ),
     path("lectures/", views.LectureViewSet.as_view({"get": "list"}), name="lectures"),
     path("results/", views.ResultViewSet.as_view({"get": "list"})),
     path("results/", views.ResultViewSet.as_view({"post": "create"})),
+    path("results/import/", views.import_results_view, name="import results"),
     path("semresult/", views.SemesterResultViewSet.as_view({"post": "create","get": "list"})),
     path("semester/",views.SemesterViewSet.as_view({"get":"list"})),
+    path("export/<str:name>/", views.export_view, name="export"),
+    path("cache-stats/", views.response_cache_stats_view, name="cache stats"),
     path("post/",views.PostViewSet.as_view({"get":"list"})),
+    # async (ASGI) versions of the hot student reads
+    path("async/student/main/", async_views.student_main_details),
+    path("async/student/secondary/", async_views.student_secondary_details),
+    path("async/student/timetable/", async_views.student_timetable),
+    path("async/results/", async_views.results),
+    path("async/enrollment/", async_views.enrollments),
     path("semester",views.SemesterViewSet.as_view({"get":"list"})),
 
     # path("semresult/", views.SemesterResultViewSet.as_view({})),
@@ -1,9 +1,14 @@
 from rest_framework import status, generics, viewsets
-from rest_framework.exceptions import ValidationError
-from rest_framework.decorators import api_view
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.request import Request
-from django.db.models import Q
+from django.db.models import Prefetch, Q
+from django.core.cache import cache
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import patch_vary_headers
 from students.models import (
     Student,
     Course,
@@ -15,6 +20,9 @@ from students.models import (
     Post,
     Result,
 )
+from students.exports import EXPORTS, FORMATS, stream_export
+from students.imports import READERS, import_results
+from students.timetable import clashing_courses, course_slots, timetable
 from knox.models import AuthToken
 from .serializers import (
     StudentSerializer,
@@ -23,14 +31,33 @@ from .serializers import (
     StudentSecondaryDetailsSerializer,
     StudentLoginSerializer,
     CourseSerializer,
+    CourseStudentSerializer,
     EnrollmentSerializer,
+    BulkEnrollmentSerializer,
+    EnrollmentExpandedSerializer,
     LectureSerializer,
     LectureTimeSerializer,
     SemesterResultSerializer,
+    SemesterResultExpandedSerializer,
     ResultSerializer,
     SemesterSerializer,
     PostSerializer,
 )
+from .cache import (
+    PROFILE_CACHE_TIMEOUT,
+    bump_version,
+    profile_cache_key,
+    response_cache_stats,
+)
+from .mixins import (
+    CachedListMixin,
+    ConditionalListMixin,
+    ReplicaReadMixin,
+    RowListMixin,
+)
+from .pagination import StudentKeysetPagination
+from .rows import RowSerializer, ordering_lookups
+from .transcripts import get_transcript
 
 # rest_framework imports
 from rest_framework import permissions
@@ -81,9 +108,12 @@ class RegisterAPI(generics.GenericAPIView):
 @api_view(["POST", "GET"])
 def student(request):
     if request.method == "GET":
-        students = Student.objects.all()
-        serializer = StudentSerializer(students, many=True)
-        return Response(serializer.data)
+        paginator = StudentKeysetPagination()
+        rows = RowSerializer(StudentSerializer(**_sparse_fieldset(request)))
+        students = paginator.paginate_queryset(
+            rows.values(Student.objects.all(), *ordering_lookups(paginator)), request
+        )
+        return paginator.get_paginated_response(rows.from_dicts(students))
     elif request.method == "POST":
         serializer = StudentSerializer(data=request.data)
         if serializer.is_valid():
@@ -92,30 +122,90 @@ def student(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _int_query_param(request, name):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: "must be an integer"})
+
+
+def _sparse_fieldset(request):
+    """``?fields=`` / ``?exclude=`` as ``SparseFieldsetMixin`` keyword arguments."""
+    fieldset = {}
+    for name in ("fields", "exclude"):
+        value = request.query_params.get(name)
+        if value:
+            fieldset[name] = [field for field in value.split(",") if field]
+    return fieldset
+
+
+def _student_profile(serial_number, kind, serializer_class):
+    key = profile_cache_key(kind, serial_number)
+    data = cache.get(key)
+    if data is None:
+        student = get_object_or_404(
+            serializer_class().project(Student.objects.all()), pk=serial_number
+        )
+        data = dict(serializer_class(student).data)
+        cache.set(key, data, PROFILE_CACHE_TIMEOUT)
+    return data
+
+
 @api_view(["GET"])
 def student_main_details(request):
-    if request.method == "GET":
-        students = Student.objects.all()
-        for student in students:
-            if student.serial_number == request.user.serial_number:
-                serializer = StudentMainDetailsSerializer(student)
-                return Response(serializer.data, status=status.HTTP_200_OK)
+    data = _student_profile(
+        request.user.serial_number, "main", StudentMainDetailsSerializer
+    )
+    return Response(data, status=status.HTTP_200_OK)
 
 
 @api_view(["GET"])
 def student_secondary_details(request):
-    if request.method == "GET":
-        students = Student.objects.all()
-        for student in students:
-            if student.serial_number == request.user.serial_number:
-                serializer = StudentSecondaryDetailsSerializer(student)
-                return Response(serializer.data, status=status.HTTP_200_OK)
+    data = _student_profile(
+        request.user.serial_number, "secondary", StudentSecondaryDetailsSerializer
+    )
+    return Response(data, status=status.HTTP_200_OK)
+
+
+@api_view(["GET"])
+def student_timetable(request):
+    return Response(timetable(request.user.serial_number), status=status.HTTP_200_OK)
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+@api_view(["GET"])
+def student_transcript(request):
+    return Response(
+        get_transcript(request.user.serial_number), status=status.HTTP_200_OK
+    )
+
+
+class CourseViewSet(
+    ReplicaReadMixin,
+    ConditionalListMixin,
+    CachedListMixin,
+    RowListMixin,
+    viewsets.ModelViewSet,
+):
+    version_resource = "course"
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
 
+    def students(self, request, pk=None):
+        course = get_object_or_404(Course.objects.only("id"), pk=pk)
+        paginator = StudentKeysetPagination()
+        students = paginator.paginate_queryset(
+            Student.objects.filter(enrollment__course=course).only(
+                *CourseStudentSerializer.Meta.fields
+            ),
+            request,
+            view=self,
+        )
+        serializer = CourseStudentSerializer(students, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     def get(self):
         return Response(self.queryset, status=status.HTTP_200_OK)
 
@@ -124,13 +214,24 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
     queryset = Enrollment.objects.all()
     serializer_class = EnrollmentSerializer
 
-    def list(self, request, *args, **kwargs):
-        enrollment_list = super().list(request, *args, **kwargs).data
-        response_list = []
-        for enroll in enrollment_list:
-            if enroll["student"] == request.user.serial_number:
-                response_list.append(enroll)
-        return Response(response_list)
+    def _expand_course(self):
+        return (
+            self.action == "list"
+            and self.request.query_params.get("expand") == "course"
+        )
+
+    def get_queryset(self):
+        if self.action != "list":
+            return super().get_queryset()
+        enrollments = self.queryset.filter(student=self.request.user.serial_number)
+        if self._expand_course():
+            enrollments = enrollments.select_related("course")
+        return enrollments
+
+    def get_serializer_class(self):
+        if self._expand_course():
+            return EnrollmentExpandedSerializer
+        return super().get_serializer_class()
 
     def create(self, request: Request, *args, **kwargs):
         student_serial = request.data["student"]
@@ -144,6 +245,50 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
             status=status.HTTP_403_FORBIDDEN,
         )
 
+    def bulk(self, request, *args, **kwargs):
+        serializer = BulkEnrollmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        course_ids = serializer.validated_data["courses"]
+        student = request.user
+        existing = set(
+            Course.objects.filter(pk__in=course_ids).values_list("pk", flat=True)
+        )
+        enrolled = set(
+            self.queryset.filter(student=student, course__in=existing).values_list(
+                "course", flat=True
+            )
+        )
+        clashing = clashing_courses(student, existing - enrolled)
+        slots = course_slots(existing - enrolled)
+        taken = set()
+        outcomes = []
+        enrollments = []
+        with transaction.atomic():
+            for course_id in course_ids:
+                if course_id not in existing:
+                    outcome = "not_found"
+                elif course_id in enrolled:
+                    outcome = "already_enrolled"
+                elif course_id in clashing or slots[course_id] & taken:
+                    outcome = "clash"
+                elif not Course.reserve_seat(course_id):
+                    outcome = "full"
+                else:
+                    outcome = "enrolled"
+                    enrolled.add(course_id)
+                    taken |= slots[course_id]
+                    enrollments.append(Enrollment(student=student, course_id=course_id))
+                outcomes.append({"course": course_id, "status": outcome})
+            # seats are already reserved, and bulk_create skips Enrollment.save()
+            Enrollment.objects.bulk_create(enrollments)
+        if enrollments:
+            # bulk_create sends no signals, and the catalog counts enrollments
+            bump_version("course")
+        return Response(
+            outcomes,
+            status=status.HTTP_201_CREATED if enrollments else status.HTTP_200_OK,
+        )
+
     def delete(self, request, *args, **kwargs):
         params = request.query_params
         if params.get("student_id") == request.user.serial_number:
@@ -157,17 +302,22 @@ class EnrollmentViewSet(viewsets.ModelViewSet):
         )
 
 
-class LectureViewSet(viewsets.ModelViewSet):
+class LectureViewSet(
+    ReplicaReadMixin, ConditionalListMixin, CachedListMixin, viewsets.ModelViewSet
+):
+    version_resource = "lecture"
+    cache_scope_param = "course"
     queryset = Lecture.objects.all()
     serializer_class = LectureSerializer
 
-    def list(self, request: Request, *args, **kwargs):
-        lectures = self.queryset.filter(course=request.query_params.get("course"))
-        serializer = LectureSerializer(lectures, many=True)
-        return Response(serializer.data)
+    def get_queryset(self):
+        if self.action != "list":
+            return super().get_queryset()
+        return self.queryset.filter(course=_int_query_param(self.request, "course"))
 
 
-class LectureTimeViewSet(viewsets.ModelViewSet):
+class LectureTimeViewSet(ConditionalListMixin, viewsets.ModelViewSet):
+    version_resource = "lecture-time"
     queryset = LectureTime.objects.all()
     serializer_class = LectureTimeSerializer
 
@@ -175,7 +325,10 @@ class LectureTimeViewSet(viewsets.ModelViewSet):
         return Response(self.queryset, status=status.HTTP_200_OK)
 
 
-class SemesterViewSet(viewsets.ModelViewSet):
+class SemesterViewSet(
+    ReplicaReadMixin, ConditionalListMixin, CachedListMixin, viewsets.ModelViewSet
+):
+    version_resource = "semester"
     queryset = Semester.objects.all()
     serializer_class = SemesterSerializer
 
@@ -191,7 +344,7 @@ class SemesterViewSet(viewsets.ModelViewSet):
             return super().create(request, *args, **kwargs)
 
 
-class ResultViewSet(viewsets.ModelViewSet):
+class ResultViewSet(ReplicaReadMixin, RowListMixin, viewsets.ModelViewSet):
     queryset = Result.objects.all()
     serializer_class = ResultSerializer
 
@@ -210,14 +363,71 @@ class ResultViewSet(viewsets.ModelViewSet):
             else:
                 return super().create(request, *args, **kwargs)
 
-    def list(self, request, *args, **kwargs):
-        user_id = request.user.serial_number
-        result_list = []
-        for result in self.queryset.values_list():
-            if user_id == result[2]:
-                result_list.append(self.queryset.get(pk=result[0]))
-        serailizer = ResultSerializer(result_list, many=True)
-        return Response(serailizer.data)
+    def get_queryset(self):
+        if self.action != "list":
+            return super().get_queryset()
+        results = self.queryset.filter(student=self.request.user.serial_number)
+        semester = _int_query_param(self.request, "semester")
+        if semester is not None:
+            results = results.filter(semester=semester)
+        course = _int_query_param(self.request, "course")
+        if course is not None:
+            results = results.filter(course=course)
+        return results.select_related("course", "semester")
+
+
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+}
+
+
+@api_view(["POST"])
+@permission_classes([permissions.IsAdminUser])
+def import_results_view(request):
+    content_type = request.content_type.split(";")[0].strip()
+    if content_type not in IMPORT_FORMATS:
+        return Response(
+            {"detail": f"expected one of {', '.join(IMPORT_FORMATS)}"},
+            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        )
+    # read the body line by line instead of through request.data
+    lines = (line.decode("utf-8") for line in request._request)
+    report = import_results(READERS[IMPORT_FORMATS[content_type]](lines))
+    return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+
+EXPORT_CONTENT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def export_view(request, name):
+    if name not in EXPORTS:
+        raise NotFound(f"no export named {name}")
+    output = request.query_params.get("output", "csv")
+    if output not in EXPORT_CONTENT_TYPES:
+        raise ValidationError({"output": f"expected one of {', '.join(FORMATS)}"})
+    fields = request.query_params.get("fields")
+    fields = [field.strip() for field in fields.split(",")] if fields else None
+    compress = "gzip" in request.META.get("HTTP_ACCEPT_ENCODING", "")
+    try:
+        body = stream_export(name, output, fields, compress)
+    except ValueError as error:
+        raise ValidationError({"fields": str(error)})
+    response = StreamingHttpResponse(body, content_type=EXPORT_CONTENT_TYPES[output])
+    response["Content-Disposition"] = f'attachment; filename="{name}.{output}"'
+    if compress:
+        response["Content-Encoding"] = "gzip"
+    patch_vary_headers(response, ("Accept-Encoding",))
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def response_cache_stats_view(request):
+    return Response(response_cache_stats(), status=status.HTTP_200_OK)
 
 
 class SemesterResultViewSet(viewsets.ModelViewSet):
@@ -238,20 +448,34 @@ class SemesterResultViewSet(viewsets.ModelViewSet):
         else:
             return super().create(request, *args, **kwargs)
 
-    def list(self, request, *args, **kwargs):
-        semResult = []
-        for item in self.queryset.all():
-            if item.student.serial_number == request.user.serial_number:
-                semResult.append(item)
-        serializer = SemesterResultSerializer(semResult, many=True)
-        return Response(serializer.data)
-
+    def _expand_subjects(self):
+        return (
+            self.action == "list"
+            and self.request.query_params.get("expand") == "subjects"
+        )
 
-class PostViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        if self.action != "list":
+            return super().get_queryset()
+        sem_results = self.queryset.filter(student=self.request.user.serial_number)
+        if self._expand_subjects():
+            return sem_results.prefetch_related(
+                Prefetch(
+                    "subjects",
+                    queryset=Result.objects.select_related("course", "semester"),
+                )
+            )
+        return sem_results.prefetch_related("subjects")
+
+    def get_serializer_class(self):
+        if self._expand_subjects():
+            return SemesterResultExpandedSerializer
+        return super().get_serializer_class()
+
+
+class PostViewSet(
+    ReplicaReadMixin, ConditionalListMixin, CachedListMixin, viewsets.ModelViewSet
+):
+    version_resource = "post"
     queryset = Post.objects.all()
     serializer_class = PostSerializer
-
-
-class SemesterViewSet(viewsets.ModelViewSet):
-    queryset = Semester.objects.all()
-    serializer_class = SemesterSerializer
@@ -0,0 +1,218 @@
+"""
+Latency under concurrent load of the student read endpoints, served three ways:
+
+* ``wsgi``: the sync DRF views behind Django's threaded WSGI server,
+* ``asgi sync``: the same views under uvicorn, each run in a thread,
+* ``asgi async``: the ``/async/`` views under uvicorn.
+
+Every server runs in its own process against one fresh SQLite file (the
+production profile). A stdlib asyncio client keeps ``CONCURRENCY`` requests in
+flight for ``DURATION`` seconds, cycling over the endpoints with real knox
+tokens, and reports throughput and p50/p99 latency. Requires uvicorn.
+"""
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ENDPOINTS = (
+    "student/main/",
+    "student/timetable/",
+    "results/",
+    "enrollment/?expand=course",
+)
+CONCURRENCY = (8, 64)
+DURATION = 5.0
+STUDENTS = 500
+TOKENS = 100
+PORT = 8765
+
+
+def seed():
+    """Run inside a child process; print one knox token per line."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "UniApi.settings")
+    django.setup()
+    from django.core.management import call_command
+    from knox.models import AuthToken
+    from students.models import (
+        Course,
+        Enrollment,
+        Lecture,
+        LectureTime,
+        Result,
+        Semester,
+        Student,
+        Teacher,
+    )
+
+    call_command("migrate", verbosity=0)
+    teacher = Teacher.objects.create(first_name="T", last_name="T", email="t@x.com")
+    semester = Semester.objects.create(season="F", year=2023)
+    lecture_time = LectureTime.objects.create(start_time="09:00", day="MO")
+    courses = Course.objects.bulk_create(
+        Course(name=f"course{index}", code=f"C{index}", teacher=teacher)
+        for index in range(6)
+    )
+    Lecture.objects.bulk_create(
+        Lecture(course=course, unites=3, lecture_time=lecture_time)
+        for course in courses
+    )
+    students = Student.objects.bulk_create(
+        Student(serial_number=serial_number, password="!", supervisor=teacher)
+        for serial_number in range(1, STUDENTS + 1)
+    )
+    Enrollment.objects.bulk_create(
+        Enrollment(student=student, course=course)
+        for student in students
+        for course in courses
+    )
+    Result.objects.bulk_create(
+        Result(
+            student=student,
+            course=course,
+            semester=semester,
+            work_degree=20,
+            semifinal_degree=20,
+            final_degree=30,
+            total_degree=70,
+        )
+        for student in students
+        for course in courses
+    )
+    for student in students[:TOKENS]:
+        print(AuthToken.objects.create(student)[1])
+
+
+def serve_wsgi():
+    """Run inside a child process: runserver's threaded WSGI server."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "UniApi.settings")
+    from django.core.servers.basehttp import WSGIRequestHandler, run
+    from django.core.wsgi import get_wsgi_application
+
+    WSGIRequestHandler.log_message = lambda *args: None
+    run("127.0.0.1", PORT, get_wsgi_application(), threading=True)
+
+
+def start_server(kind, env):
+    if kind == "wsgi":
+        command = [sys.executable, "-m", "benchmarks.bench_asgi", "--wsgi"]
+    else:
+        command = [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "UniApi.asgi:application",
+            "--port",
+            str(PORT),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ]
+    server = subprocess.Popen(
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", PORT), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+
+async def fetch(path, token):
+    reader, writer = await asyncio.open_connection("127.0.0.1", PORT)
+    writer.write(
+        f"GET /{path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Authorization: Token {token}\r\nConnection: close\r\n\r\n".encode()
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return response.startswith(b"HTTP/1.1 200")
+
+
+async def load(prefix, tokens, concurrency):
+    timings = []
+    errors = 0
+    deadline = time.perf_counter() + DURATION
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            path = prefix + random.choice(ENDPOINTS)
+            started = time.perf_counter()
+            try:
+                ok = await fetch(path, random.choice(tokens))
+            except OSError:
+                ok = False
+            if ok:
+                timings.append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    timings.sort()
+    return (
+        len(timings) / DURATION,
+        statistics.median(timings),
+        timings[int(len(timings) * 0.99) - 1],
+        errors,
+    )
+
+
+def main():
+    from .common import report
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(
+            os.environ,
+            UNIAPI_SQLITE_PROFILE="production",
+            UNIAPI_SQLITE_NAME=os.path.join(directory, "bench.sqlite3"),
+        )
+        tokens = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_asgi", "--seed"],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        for label, kind, prefix in (
+            ("wsgi", "wsgi", ""),
+            ("asgi sync", "asgi", ""),
+            ("asgi async", "asgi", "async/"),
+        ):
+            server = start_server(kind, env)
+            try:
+                for concurrency in CONCURRENCY:
+                    rows.append(
+                        (label, concurrency)
+                        + asyncio.run(load(prefix, tokens, concurrency))
+                    )
+            finally:
+                server.terminate()
+                server.wait()
+    report(
+        f"student reads for {DURATION:.0f}s per row",
+        ("server", "concurrency", "requests/s", "p50 ms", "p99 ms", "errors"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    if "--seed" in sys.argv:
+        seed()
+    elif "--wsgi" in sys.argv:
+        serve_wsgi()
+    else:
+        main()
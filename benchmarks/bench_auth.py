@@ -0,0 +1,47 @@
+"""
+Per-request authentication overhead of Knox ``TokenAuthentication`` against
+``CachedTokenAuthentication`` for a valid token.
+"""
+from .common import measure, report, seed_students, setup_database
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from knox.auth import TokenAuthentication
+from knox.models import AuthToken
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from api.authentication import CachedTokenAuthentication
+from api.cache import auth_cache
+from students.models import Student
+
+REPEAT = 2000
+
+
+def main():
+    setup_database()
+    seed_students(1000)
+    student = Student.objects.get(pk=500)
+    for _ in range(5):
+        AuthToken.objects.create(student)
+    _, token = AuthToken.objects.create(student)
+    request = Request(
+        APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Token {token}")
+    )
+    auth_cache.clear()
+    rows = []
+    for authenticator in (TokenAuthentication(), CachedTokenAuthentication()):
+        authenticator.authenticate(request)
+        with CaptureQueriesContext(connection) as queries:
+            authenticator.authenticate(request)
+        median, p95 = measure(lambda: authenticator.authenticate(request), REPEAT)
+        rows.append(
+            (type(authenticator).__name__, len(queries), median * 1000, p95 * 1000)
+        )
+    report(
+        "token authentication per request",
+        ("class", "queries", "median us", "p95 us"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
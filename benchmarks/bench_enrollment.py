@@ -0,0 +1,88 @@
+"""
+Enrollment throughput when many threads race for the seats of one course,
+through the conditional ``Course.reserve_seat`` update.
+
+Every round adds a course with ``CAPACITY`` seats and ``STUDENTS`` fresh
+students, then lets ``threads`` threads enroll them all. Half the attempts
+find the course full.
+"""
+import queue
+import threading
+import time
+
+from .common import report, setup_database
+from django.db import OperationalError, connection
+from students.models import Course, CourseFull, Enrollment, Student, Teacher
+
+THREADS = (1, 4, 8, 16)
+STUDENTS = 400
+CAPACITY = STUDENTS // 2
+
+
+def run_round(teacher, threads, first_serial):
+    course = Course.objects.create(
+        name=f"race{threads}", code=f"R{threads}", teacher=teacher, capacity=CAPACITY
+    )
+    serial_numbers = range(first_serial, first_serial + STUDENTS)
+    Student.objects.bulk_create(
+        Student(serial_number=serial_number, password="!")
+        for serial_number in serial_numbers
+    )
+    pending = queue.Queue()
+    for serial_number in serial_numbers:
+        pending.put(serial_number)
+    retries = queue.Queue()
+
+    def enroll():
+        try:
+            while True:
+                try:
+                    serial_number = pending.get_nowait()
+                except queue.Empty:
+                    return
+                while True:
+                    try:
+                        Enrollment.objects.create(
+                            student_id=serial_number, course=course
+                        )
+                    except CourseFull:
+                        pass
+                    except OperationalError:
+                        # the shared in-memory database has no busy wait
+                        retries.put(None)
+                        time.sleep(0.001)
+                        continue
+                    break
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=enroll) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    course.refresh_from_db()
+    assert course.enrolled_count == CAPACITY, course.enrolled_count
+    return STUDENTS / elapsed, retries.qsize()
+
+
+def main():
+    setup_database()
+    teacher = Teacher.objects.create(
+        first_name="Bench", last_name="Teacher", email="bench@example.com"
+    )
+    rows = []
+    for index, threads in enumerate(THREADS):
+        per_second, retries = run_round(teacher, threads, 1 + index * STUDENTS)
+        rows.append((threads, per_second, retries))
+    report(
+        f"{STUDENTS} enrollment attempts for {CAPACITY} seats",
+        ("threads", "attempts/s", "lock retries"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
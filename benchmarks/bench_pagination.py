@@ -0,0 +1,64 @@
+"""
+Per-page latency of keyset pagination on the student table, at page 1 and
+page 10,000, next to the same pages fetched with LIMIT/OFFSET.
+
+Only the paginated fetch is timed; serialization cost is identical for both
+strategies and is left out so the page-depth effect is visible.
+"""
+from base64 import b64encode
+from urllib.parse import urlencode
+
+from .common import measure, report, seed_students, setup_database
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from api.pagination import StudentKeysetPagination
+from students.models import Student
+
+STUDENTS = 100_000
+PAGE_SIZE = 10
+PAGES = (1, 10_000)
+
+
+def keyset_cursor(position):
+    return b64encode(urlencode({"p": position}).encode()).decode()
+
+
+def main():
+    setup_database()
+    seed_students(STUDENTS)
+    factory = APIRequestFactory()
+    rows = []
+    for page in PAGES:
+        last_seen = (page - 1) * PAGE_SIZE
+        params = {"page_size": PAGE_SIZE}
+        if last_seen:
+            params["cursor"] = keyset_cursor(last_seen)
+        keyset_request = Request(factory.get("/student/", params))
+        offset_request = Request(
+            factory.get("/student/", {"limit": PAGE_SIZE, "offset": last_seen})
+        )
+
+        def keyset():
+            return StudentKeysetPagination().paginate_queryset(
+                Student.objects.all(), keyset_request
+            )
+
+        def offset():
+            return LimitOffsetPagination().paginate_queryset(
+                Student.objects.order_by("serial_number"), offset_request
+            )
+
+        assert keyset()[0].serial_number == last_seen + 1
+        assert offset()[0].serial_number == last_seen + 1
+        rows.append((page, "keyset", *measure(keyset)))
+        rows.append((page, "offset", *measure(offset)))
+    report(
+        f"student pages, {STUDENTS} rows, page size {PAGE_SIZE} (ms)",
+        ("page", "strategy", "median", "p95"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
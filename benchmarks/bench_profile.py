@@ -0,0 +1,37 @@
+"""
+Latency of the ``student/main/`` and ``student/secondary/`` endpoints as the
+student table grows. Both the uncached (cold) and cached (warm) paths should
+stay flat from 1k to 100k students.
+"""
+from .common import client_for, measure, report, seed_students, setup_database
+from django.core.cache import cache
+from students.models import Student
+
+SIZES = (1_000, 10_000, 100_000)
+ROUTES = ("/student/main/", "/student/secondary/")
+
+
+def main():
+    setup_database()
+    rows = []
+    for size in SIZES:
+        seed_students(size)
+        client = client_for(Student.objects.get(pk=size // 2))
+        for route in ROUTES:
+
+            def cold():
+                cache.clear()
+                client.get(route)
+
+            cold_median, cold_p95 = measure(cold)
+            warm_median, warm_p95 = measure(lambda: client.get(route))
+            rows.append((size, route, cold_median, cold_p95, warm_median, warm_p95))
+    report(
+        "student profile latency (ms)",
+        ("students", "route", "cold median", "cold p95", "warm median", "warm p95"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Overhead of ``QueryStatsMiddleware`` per request: without the middleware, with
+it installed but not sampling, and measuring every request, on a one-query
+route and on a route with one query per semester.
+"""
+from .common import client_for, measure, report, seed_students, setup_database
+from django.core.cache import cache
+from django.db import connection, reset_queries
+from django.test import modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from api.cache import response_cache
+from students.models import Semester, Student
+
+REPEAT = 300
+ROUTES = ("/enrollment/", "/semester/")
+
+
+def main():
+    setup_database()
+    seed_students(100)
+    Semester.objects.bulk_create(
+        Semester(season="F", year=year) for year in range(2000, 2050)
+    )
+    student = Student.objects.get(pk=1)
+    configurations = (
+        (
+            "no middleware",
+            modify_settings(
+                MIDDLEWARE={"remove": "api.querystats.QueryStatsMiddleware"}
+            ),
+        ),
+        ("sample rate 0", override_settings(QUERY_STATS_SAMPLE_RATE=0)),
+        ("sample rate 1", override_settings(QUERY_STATS_SAMPLE_RATE=1)),
+    )
+    rows = []
+    for route in ROUTES:
+        for name, settings in configurations:
+            with settings, override_settings(QUERY_STATS_N_PLUS_ONE=10**6):
+                client = client_for(student)
+
+                def get():
+                    # keep the response cache out of the way of /semester/
+                    cache.clear()
+                    response_cache.clear()
+                    client.get(route)
+
+                get()
+                # DEBUG keeps a query log that request_started resets mid-capture
+                reset_queries()
+                with CaptureQueriesContext(connection) as queries:
+                    get()
+                median, p95 = measure(get, REPEAT)
+            rows.append((route, name, len(queries), median, p95))
+    report(
+        "GET per request",
+        ("route", "configuration", "queries", "median ms", "p95 ms"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+End-to-end benchmark of every route in ``api/urls.py``.
+
+For each data set size (students generated with ``students.synthetic``) a
+child process builds a fresh in-memory database and sends ``--repeat``
+requests per route through the Django test client, with knox token
+authentication and warm caches, recording:
+
+* median and p95 latency in milliseconds,
+* the number of queries of one request,
+* the peak traced memory of one request, in KiB,
+* the response status.
+
+Results for all sizes are written to one JSON file for before/after
+comparisons::
+
+    python -m benchmarks.bench_routes --sizes 1000,10000,100000 --output before.json
+
+Adding a route to ``api/urls.py`` without a request here is an error.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+SIZES = (1_000, 10_000, 100_000)
+REPEAT = 10
+JSON = "application/json"
+
+
+class Context:
+    """Users, tokens and ids the route requests are built from."""
+
+    def __init__(self):
+        from django.contrib.auth.hashers import make_password
+        from django.test import Client
+        from students.models import Course, Enrollment, Result, Semester, Student
+
+        self.client = Client()
+        self.rng = random.Random(0)
+        self.student = Student.objects.get(pk=1)
+        self.next_serial = Student.objects.order_by("-pk").first().pk + 1
+        self.admin = Student.objects.create(
+            serial_number=self.take_serial(),
+            password=make_password(None),
+            is_staff=True,
+            is_superuser=True,
+        )
+        self.token = self.new_token(self.student)
+        self.admin_token = self.new_token(self.admin)
+        self.course = (
+            Enrollment.objects.filter(student=self.student)
+            .values_list("course", flat=True)
+            .first()
+        )
+        self.courses = list(Course.objects.values_list("pk", flat=True)[:10])
+        self.semester = Semester.objects.values_list("pk", flat=True).first()
+        # publishing warms the transcripts of everyone in the imported
+        # semesters, so imports go to a semester of their own
+        self.import_semester = Semester.objects.create(season="S", year=2099).pk
+        self.results = list(Result.objects.values_list("student", "course")[:100])
+
+    def take_serial(self):
+        self.next_serial += 1
+        return self.next_serial - 1
+
+    def new_token(self, student):
+        from knox.models import AuthToken
+
+        return AuthToken.objects.create(student)[1]
+
+    def auth(self, token=None):
+        return {"HTTP_AUTHORIZATION": f"Token {token or self.token}"}
+
+    def admin_auth(self):
+        return self.auth(self.admin_token)
+
+    def fresh_student(self):
+        from students.models import Student
+
+        return Student.objects.create(serial_number=self.take_serial(), password="!")
+
+    def registration(self):
+        from students.synthetic import DEFAULT_PASSWORD, student_fields
+
+        fields = student_fields(self.rng, self.take_serial())
+        fields["date_of_birth"] = fields["date_of_birth"].isoformat()
+        return {**fields, "password": DEFAULT_PASSWORD}
+
+    def results_csv(self):
+        from students.imports import DEGREE_FIELDS, REFERENCE_FIELDS
+
+        body = io.StringIO()
+        writer = csv.writer(body)
+        writer.writerow(REFERENCE_FIELDS + DEGREE_FIELDS)
+        for key in self.results:
+            writer.writerow(
+                key + (self.import_semester, 10, 20, self.rng.randint(10, 60))
+            )
+        return body.getvalue()
+
+
+def route_requests(ctx):
+    """
+    Map ``(route, method)`` to a function building one request, untimed, as
+    ``(path, client keyword arguments)``.
+    """
+    from students.synthetic import DEFAULT_PASSWORD
+
+    def fresh_auth():
+        return ctx.auth(ctx.new_token(ctx.fresh_student()))
+
+    def enroll():
+        student = ctx.fresh_student()
+        return "/enroll/", {
+            "data": {"student": student.pk, "course": ctx.course},
+            "content_type": JSON,
+            **ctx.auth(ctx.new_token(student)),
+        }
+
+    return {
+        ("student/main/", "get"): lambda: ("/student/main/", ctx.auth()),
+        ("student/secondary/", "get"): lambda: ("/student/secondary/", ctx.auth()),
+        ("student/transcript/", "get"): lambda: ("/student/transcript/", ctx.auth()),
+        ("student/timetable/", "get"): lambda: ("/student/timetable/", ctx.auth()),
+        ("register/", "post"): lambda: (
+            "/register/",
+            {"data": ctx.registration(), "content_type": JSON},
+        ),
+        ("login/", "post"): lambda: (
+            "/login/",
+            {
+                "data": {
+                    "serial_number": ctx.student.pk,
+                    "password": DEFAULT_PASSWORD,
+                },
+                "content_type": JSON,
+            },
+        ),
+        ("logout/", "post"): lambda: (
+            "/logout/",
+            ctx.auth(ctx.new_token(ctx.student)),
+        ),
+        ("logoutall/", "post"): lambda: ("/logoutall/", fresh_auth()),
+        ("courses/", "get"): lambda: ("/courses/", ctx.auth()),
+        ("courses/<int:pk>/students/", "get"): lambda: (
+            f"/courses/{ctx.course}/students/",
+            ctx.auth(),
+        ),
+        ("enrollment/", "get"): lambda: ("/enrollment/?expand=course", ctx.auth()),
+        ("disenroll/", "get"): lambda: (
+            f"/disenroll/?student_id={ctx.student.pk}&course_id={ctx.course}",
+            ctx.auth(),
+        ),
+        ("enroll/", "post"): enroll,
+        ("enroll/bulk/", "post"): lambda: (
+            "/enroll/bulk/",
+            {"data": {"courses": ctx.courses}, "content_type": JSON, **fresh_auth()},
+        ),
+        ("lectures/", "get"): lambda: (f"/lectures/?course={ctx.course}", ctx.auth()),
+        ("results/", "get"): lambda: ("/results/", ctx.auth()),
+        # shadowed by the GET-only "results/" route above, so this is a 405
+        ("results/", "post"): lambda: (
+            "/results/",
+            {"data": {}, "content_type": JSON, **ctx.auth()},
+        ),
+        ("results/import/", "post"): lambda: (
+            "/results/import/",
+            {"data": ctx.results_csv(), "content_type": "text/csv", **ctx.admin_auth()},
+        ),
+        ("semresult/", "get"): lambda: ("/semresult/", ctx.auth()),
+        ("semresult/", "post"): lambda: (
+            "/semresult/",
+            {
+                "data": {"student": ctx.student.pk, "semester": ctx.semester},
+                "content_type": JSON,
+                **ctx.auth(),
+            },
+        ),
+        ("semester/", "get"): lambda: ("/semester/", ctx.auth()),
+        ("semester", "get"): lambda: ("/semester", ctx.auth()),
+        ("export/<str:name>/", "get"): lambda: (
+            "/export/students/?output=ndjson",
+            ctx.admin_auth(),
+        ),
+        ("cache-stats/", "get"): lambda: ("/cache-stats/", ctx.admin_auth()),
+        ("post/", "get"): lambda: ("/post/", ctx.auth()),
+        ("async/student/main/", "get"): lambda: ("/async/student/main/", ctx.auth()),
+        ("async/student/secondary/", "get"): lambda: (
+            "/async/student/secondary/",
+            ctx.auth(),
+        ),
+        ("async/student/timetable/", "get"): lambda: (
+            "/async/student/timetable/",
+            ctx.auth(),
+        ),
+        ("async/results/", "get"): lambda: ("/async/results/", ctx.auth()),
+        ("async/enrollment/", "get"): lambda: ("/async/enrollment/", ctx.auth()),
+    }
+
+
+def check_coverage(requests):
+    from api.urls import urlpatterns
+
+    covered = {route for route, _ in requests}
+    missing = [
+        str(pattern.pattern)
+        for pattern in urlpatterns
+        if str(pattern.pattern) not in covered
+    ]
+    if missing:
+        raise SystemExit(f"no benchmark request for: {', '.join(missing)}")
+
+
+def send(ctx, method, build):
+    path, kwargs = build()
+    started = time.perf_counter()
+    response = getattr(ctx.client, method)(path, **kwargs)
+    if response.streaming:
+        b"".join(response.streaming_content)
+    return (time.perf_counter() - started) * 1000, response.status_code
+
+
+def run_size(students, repeat):
+    """Run inside a child process; print the results for one size as JSON."""
+    import logging
+    import statistics
+
+    from .common import setup_database
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+    from students.synthetic import generate
+
+    logging.getLogger("django.request").setLevel(logging.CRITICAL)
+    setup_database()
+    started = time.perf_counter()
+    generate(students)
+    generated = time.perf_counter() - started
+    ctx = Context()
+    requests = route_requests(ctx)
+    check_coverage(requests)
+    routes = {}
+    for (route, method), build in requests.items():
+        print(f"{students} students: {method.upper()} /{route}", file=sys.stderr)
+        send(ctx, method, build)
+        timings = sorted(send(ctx, method, build)[0] for _ in range(repeat))
+        # DEBUG keeps a query log that request_started resets mid-capture
+        reset_queries()
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            _, status = send(ctx, method, build)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        routes[f"{method.upper()} /{route}"] = {
+            "status": status,
+            "median_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(timings[max(int(len(timings) * 0.95) - 1, 0)], 3),
+            "queries": len(queries),
+            "peak_kib": round(peak / 1024, 1),
+        }
+    print(
+        json.dumps(
+            {
+                "students": students,
+                "generate_seconds": round(generated, 1),
+                "routes": routes,
+            }
+        )
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(map(str, SIZES)),
+        help="comma-separated student counts",
+    )
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--output", default="bench_routes.json")
+    options = parser.parse_args()
+
+    from .common import report
+
+    results = []
+    for size in options.sizes.split(","):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_routes",
+                "--child",
+                size,
+                str(options.repeat),
+            ],
+            env=os.environ,
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+    with open(options.output, "w") as output:
+        json.dump(
+            {
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "repeat": options.repeat,
+                "sizes": results,
+            },
+            output,
+            indent=2,
+        )
+    for result in results:
+        report(
+            f"{result['students']} students (generated in "
+            f"{result['generate_seconds']}s)",
+            ("route", "status", "median ms", "queries", "peak KiB"),
+            [
+                (
+                    route,
+                    stats["status"],
+                    stats["median_ms"],
+                    stats["queries"],
+                    stats["peak_kib"],
+                )
+                for route, stats in result["routes"].items()
+            ],
+        )
+    print(f"\nwrote {options.output}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        run_size(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,78 @@
+"""
+Rows per second of the three big lists (students, courses, results) through
+their ModelSerializers and through ``RowSerializer``, from query to rendered
+JSON. The two outputs are checked to be byte-identical before timing.
+"""
+from .common import measure, report, seed_students, setup_database
+from rest_framework.renderers import JSONRenderer
+from api.rows import RowSerializer
+from api.serializers import CourseSerializer, ResultSerializer, StudentSerializer
+from students.models import Course, Result, Semester, Student, Teacher
+
+STUDENTS = 5000
+COURSES = 2000
+RESULTS_PER_STUDENT = 2
+REPEAT = 20
+
+
+def seed():
+    seed_students(STUDENTS)
+    teacher = Teacher.objects.first()
+    semester = Semester.objects.create(season="F", year=2023)
+    courses = Course.objects.bulk_create(
+        Course(name=f"course{index}", code=f"C{index}", teacher=teacher)
+        for index in range(COURSES)
+    )
+    Result.objects.bulk_create(
+        Result(
+            student_id=serial_number,
+            course=courses[(serial_number + offset) % COURSES],
+            semester=semester,
+            work_degree=20,
+            semifinal_degree=20,
+            final_degree=30,
+            total_degree=70,
+        )
+        for serial_number in range(1, STUDENTS + 1)
+        for offset in range(RESULTS_PER_STUDENT)
+    )
+
+
+def main():
+    setup_database()
+    seed()
+    renderer = JSONRenderer()
+    rows = []
+    for name, serializer_class, queryset in (
+        ("students", StudentSerializer, Student.objects.order_by("serial_number")),
+        ("courses", CourseSerializer, Course.objects.order_by("id")),
+        (
+            "results",
+            ResultSerializer,
+            Result.objects.select_related("course", "semester").order_by("id"),
+        ),
+    ):
+        count = queryset.count()
+        row_serializer = RowSerializer(serializer_class())
+
+        def model_serializer():
+            return renderer.render(serializer_class(queryset.all(), many=True).data)
+
+        def row_path():
+            return renderer.render(
+                row_serializer.from_dicts(row_serializer.values(queryset.all()))
+            )
+
+        assert model_serializer() == row_path()
+        for engine, func in (("ModelSerializer", model_serializer), ("rows", row_path)):
+            median, p95 = measure(func, REPEAT)
+            rows.append((name, engine, count / median * 1000, median, p95))
+    report(
+        "serialized and rendered list responses",
+        ("list", "engine", "rows/s", "median ms", "p95 ms"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
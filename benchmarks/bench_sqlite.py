@@ -0,0 +1,123 @@
+"""
+Mixed read/write throughput of the default SQLite configuration against the
+production profile (``UNIAPI_SQLITE_PROFILE=production``).
+
+Each profile runs in its own process against a fresh database file: reader
+threads fetch student profiles and course pages while writer threads create
+login tokens and enrollments, the two concurrent writers of the real app.
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROFILES = ("default", "production")
+READERS = 8
+WRITERS = 4
+DURATION = 5.0
+STUDENTS = 2000
+
+
+def run_profile():
+    """Run inside a child process configured through environment variables."""
+    import django
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "UniApi.settings")
+    django.setup()
+    from django.core.management import call_command
+    from django.db import OperationalError, connection, transaction
+    from knox.models import AuthToken
+    from students.models import Course, Enrollment, Student, Teacher
+
+    call_command("migrate", verbosity=0)
+    teacher = Teacher.objects.create(first_name="T", last_name="T", email="t@x.com")
+    courses = Course.objects.bulk_create(
+        Course(name=f"course{index}", code=f"C{index}", teacher=teacher)
+        for index in range(50)
+    )
+    Student.objects.bulk_create(
+        Student(serial_number=serial_number, password="!")
+        for serial_number in range(1, STUDENTS + 1)
+    )
+    connection.close()
+
+    counts = {"reads": 0, "writes": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + DURATION
+
+    def count(kind):
+        with lock:
+            counts[kind] += 1
+
+    def reader():
+        while time.perf_counter() < deadline:
+            try:
+                Student.objects.get(pk=random.randint(1, STUDENTS))
+                list(Course.objects.order_by("id")[:20])
+                count("reads")
+            except OperationalError:
+                count("locked")
+        connection.close()
+
+    def writer():
+        while time.perf_counter() < deadline:
+            serial_number = random.randint(1, STUDENTS)
+            try:
+                with transaction.atomic():
+                    AuthToken.objects.create(Student(serial_number=serial_number))
+                    Enrollment.objects.create(
+                        student_id=serial_number, course=random.choice(courses)
+                    )
+                count("writes")
+            except OperationalError:
+                count("locked")
+        connection.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)]
+    threads += [threading.Thread(target=writer) for _ in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(
+        f"{os.environ['UNIAPI_SQLITE_PROFILE']} "
+        f"{counts['reads'] / DURATION:.0f} "
+        f"{counts['writes'] / DURATION:.0f} "
+        f"{counts['locked']}"
+    )
+
+
+def main():
+    from .common import report
+
+    rows = []
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as directory:
+            env = dict(
+                os.environ,
+                UNIAPI_SQLITE_PROFILE=profile,
+                UNIAPI_SQLITE_NAME=os.path.join(directory, "bench.sqlite3"),
+            )
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_sqlite", "--child"],
+                env=env,
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout.split()
+        rows.append((output[0], float(output[1]), float(output[2]), output[3]))
+    report(
+        f"{READERS} readers / {WRITERS} writers for {DURATION:.0f}s",
+        ("profile", "reads/s", "writes/s", "locked errors"),
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        run_profile()
+    else:
+        main()
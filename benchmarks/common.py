@@ -0,0 +1,82 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Run the scripts from the repository root, e.g.::
+
+    python -m benchmarks.bench_profile
+
+Every script works against a throwaway test database, so ``db.sqlite3`` is
+never touched.
+"""
+import os
+import statistics
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "UniApi.settings")
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from students.models import Student, Teacher  # noqa: E402
+
+BATCH_SIZE = 5000
+
+
+def setup_database():
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+
+def seed_students(count):
+    """Top the student table up to ``count`` rows, skipping password hashing."""
+    teacher = Teacher.objects.first() or Teacher.objects.create(
+        first_name="Bench", last_name="Teacher", email="bench@example.com"
+    )
+    start = Student.objects.count() + 1
+    for offset in range(start, count + 1, BATCH_SIZE):
+        Student.objects.bulk_create(
+            Student(
+                serial_number=serial,
+                password="!",
+                first_name=f"first{serial}",
+                last_name=f"last{serial}",
+                email=f"student{serial}@example.com",
+                gender="M",
+                marital_status="S",
+                residence="I",
+                supervisor=teacher,
+            )
+            for serial in range(offset, min(offset + BATCH_SIZE, count + 1))
+        )
+
+
+def client_for(student):
+    client = APIClient()
+    client.force_authenticate(student)
+    return client
+
+
+def measure(func, repeat=200):
+    """Call ``func`` ``repeat`` times and return (median, p95) in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def report(title, header, rows):
+    print(f"\n{title}")
+    print("  ".join(f"{column:>26}" for column in header))
+    for row in rows:
+        print(
+            "  ".join(
+                f"{value:>26.3f}" if isinstance(value, float) else f"{value:>26}"
+                for value in row
+            )
+        )
@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
 from .models import (
     Student,
     Course,
@@ -15,13 +18,108 @@ from .models import (
 # Register your models here.
 
 
-admin.site.register(Student)
-admin.site.register(Course)
-admin.site.register(Teacher)
-admin.site.register(Lecture)
-admin.site.register(LectureTime)
-admin.site.register(Enrollment)
-admin.site.register(Result)
-admin.site.register(SemesterResult)
-admin.site.register(Semester)
-admin.site.register(Post)
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for large tables that skips ``COUNT(*)`` on unfiltered lists.
+
+    The row count of an unfiltered changelist is estimated from the highest
+    primary key, which is a single index lookup. Filtered or searched lists
+    still get an exact count. Only for auto-increment primary keys: on
+    ``Student`` the key is the serial number, which says nothing about the
+    row count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if queryset.query.where:
+            return super().count
+        return queryset.model._default_manager.aggregate(top=Max("pk"))["top"] or 0
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Student)
+class StudentAdmin(admin.ModelAdmin):
+    show_full_result_count = False
+    list_display = ("serial_number", "first_name", "last_name", "section", "division")
+    list_filter = ("is_active", "is_staff")
+    search_fields = ("=serial_number", "^first_name", "^last_name")
+    raw_id_fields = ("supervisor", "current_semester")
+    filter_horizontal = ("groups", "user_permissions")
+
+
+@admin.register(Teacher)
+class TeacherAdmin(admin.ModelAdmin):
+    list_display = ("first_name", "last_name", "email")
+    search_fields = ("^first_name", "^last_name", "email")
+
+
+@admin.register(Course)
+class CourseAdmin(admin.ModelAdmin):
+    list_display = ("code", "name", "teacher", "capacity", "enrolled_count")
+    list_select_related = ("teacher",)
+    search_fields = ("^code", "name")
+    autocomplete_fields = ("teacher",)
+
+
+@admin.register(Lecture)
+class LectureAdmin(admin.ModelAdmin):
+    list_display = ("title", "course", "lecture_time", "unites")
+    list_select_related = ("course", "lecture_time")
+    list_filter = ("lecture_time__day",)
+    search_fields = ("title", "^course__code")
+    autocomplete_fields = ("course",)
+
+
+@admin.register(LectureTime)
+class LectureTimeAdmin(admin.ModelAdmin):
+    list_display = ("start_time", "day")
+    list_filter = ("day",)
+
+
+@admin.register(Enrollment)
+class EnrollmentAdmin(LargeTableAdmin):
+    list_display = ("student", "course", "date_enrolled")
+    list_select_related = ("student", "course")
+    list_filter = ("course",)
+    search_fields = ("=student__serial_number",)
+    raw_id_fields = ("student",)
+    autocomplete_fields = ("course",)
+
+
+@admin.register(Semester)
+class SemesterAdmin(admin.ModelAdmin):
+    list_display = ("season", "year")
+    list_filter = ("season",)
+    search_fields = ("=year",)
+    raw_id_fields = ("students",)
+
+
+@admin.register(Result)
+class ResultAdmin(LargeTableAdmin):
+    list_display = ("student", "course", "semester", "total_degree")
+    list_select_related = ("student", "course", "semester")
+    list_filter = ("semester",)
+    search_fields = ("=student__serial_number",)
+    raw_id_fields = ("student",)
+    autocomplete_fields = ("course", "semester")
+    readonly_fields = ("total_degree",)
+
+
+@admin.register(SemesterResult)
+class SemesterResultAdmin(LargeTableAdmin):
+    list_display = ("student", "semester", "total_degree")
+    list_select_related = ("student", "semester")
+    list_filter = ("semester",)
+    search_fields = ("=student__serial_number",)
+    raw_id_fields = ("student", "subjects")
+    autocomplete_fields = ("semester",)
+
+
+@admin.register(Post)
+class PostAdmin(admin.ModelAdmin):
+    list_display = ("content", "image_link")
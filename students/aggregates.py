@@ -0,0 +1,90 @@
+"""
+Maintained ``SemesterResult`` aggregates.
+
+Every ``Result`` of a student in a semester contributes to the
+``SemesterResult`` of the same student and semester:
+
+* ``subjects_count`` - number of results
+* ``total_degree`` - sum of ``Result.total_degree``
+* ``total_unites`` - sum of the course units (sum of ``Lecture.unites``)
+* ``weighted_degree`` - sum of ``Result.total_degree`` times course units
+
+Saves and deletes adjust these counters in place with ``F()`` updates.
+``rebuild_semester_results`` recomputes them from scratch in one UPDATE.
+"""
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from .models import Lecture, Result, SemesterResult
+
+
+def _course_unites(Lecture, course):
+    return Coalesce(
+        Subquery(
+            Lecture.objects.filter(course=course)
+            .values("course")
+            .annotate(unites=Sum("unites"))
+            .values("unites")
+        ),
+        Value(0),
+    )
+
+
+def apply_result_change(old, new):
+    """
+    Move a result's contribution from ``old`` to ``new``.
+
+    Both are ``Result.aggregate_key()`` tuples, or None when the result is
+    being created (``old``) or deleted (``new``).
+    """
+    if old == new:
+        return
+    if old and new and old[:3] == new[:3]:
+        student, semester, course, total = new
+        delta = total - old[3]
+        SemesterResult.objects.filter(student=student, semester=semester).update(
+            total_degree=F("total_degree") + delta,
+            weighted_degree=F("weighted_degree")
+            + delta * _course_unites(Lecture, course),
+        )
+        return
+    for key, sign in ((old, -1), (new, 1)):
+        if key is None:
+            continue
+        student, semester, course, total = key
+        unites = _course_unites(Lecture, course)
+        SemesterResult.objects.filter(student=student, semester=semester).update(
+            subjects_count=F("subjects_count") + sign,
+            total_degree=F("total_degree") + sign * total,
+            total_unites=F("total_unites") + sign * unites,
+            weighted_degree=F("weighted_degree") + sign * total * unites,
+        )
+
+
+def rebuild_updates(Result, Lecture):
+    """UPDATE expressions recomputing every aggregate with correlated subqueries."""
+    results = (
+        Result.objects.filter(
+            student=OuterRef("student"), semester=OuterRef("semester")
+        )
+        .annotate(unites=_course_unites(Lecture, OuterRef("course")))
+        .values("student")
+    )
+
+    def total(aggregate):
+        return Coalesce(
+            Subquery(results.annotate(value=aggregate).values("value")), Value(0)
+        )
+
+    return {
+        "subjects_count": total(Count("id")),
+        "total_degree": total(Sum("total_degree")),
+        "total_unites": total(Sum("unites")),
+        "weighted_degree": total(Sum(F("total_degree") * F("unites"))),
+    }
+
+
+def rebuild_semester_results(queryset=None):
+    """Recompute the aggregates of ``queryset`` (default: all) in one query."""
+    if queryset is None:
+        queryset = SemesterResult.objects.all()
+    return queryset.update(**rebuild_updates(Result, Lecture))
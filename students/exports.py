@@ -0,0 +1,118 @@
+"""
+Streaming CSV / NDJSON exports.
+
+Rows are read in keyset chunks (``WHERE pk > last ORDER BY pk LIMIT n``) as
+tuples and encoded chunk by chunk, so memory use does not depend on the
+table size. Output can be gzip-compressed on the fly.
+"""
+import csv
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Enrollment, Result, SemesterResult, Student
+
+CHUNK_SIZE = 2000
+HIDDEN_STUDENT_FIELDS = {"password", "last_login", "is_superuser", "is_staff"}
+
+EXPORTS = {
+    "students": (
+        Student,
+        tuple(
+            field.name
+            for field in Student._meta.concrete_fields
+            if field.name not in HIDDEN_STUDENT_FIELDS
+        ),
+    ),
+    "enrollments": (Enrollment, ("id", "student", "course", "date_enrolled")),
+    "results": (
+        Result,
+        (
+            "id",
+            "student",
+            "course",
+            "semester",
+            "work_degree",
+            "semifinal_degree",
+            "final_degree",
+            "total_degree",
+        ),
+    ),
+    "semester-results": (
+        SemesterResult,
+        (
+            "id",
+            "student",
+            "semester",
+            "subjects_count",
+            "total_degree",
+            "total_unites",
+            "weighted_degree",
+        ),
+    ),
+}
+FORMATS = ("csv", "ndjson")
+
+
+def resolve_fields(name, fields=None):
+    """Return the export's columns, or the requested subset of them."""
+    allowed = EXPORTS[name][1]
+    if not fields:
+        return allowed
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"unknown fields for {name}: {', '.join(unknown)}")
+    return tuple(fields)
+
+
+def iter_chunks(model, fields, chunk_size=CHUNK_SIZE):
+    pk_name = model._meta.pk.name
+    columns = (pk_name, *fields)
+    queryset = model.objects.order_by(pk_name)
+    last = None
+    while True:
+        chunk_qs = queryset if last is None else queryset.filter(pk__gt=last)
+        rows = list(chunk_qs.values_list(*columns)[:chunk_size])
+        if not rows:
+            return
+        last = rows[-1][0]
+        yield [row[1:] for row in rows]
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _encode_csv(fields, chunks):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for rows in chunks:
+        yield "".join(writer.writerow(row) for row in rows)
+
+
+def _encode_ndjson(fields, chunks):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for rows in chunks:
+        yield "".join(
+            encoder.encode(dict(zip(fields, row))) + "\n" for row in rows
+        )
+
+
+def _gzip(parts):
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for part in parts:
+        compressed = compressor.compress(part)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export(name, format="csv", fields=None, compress=False):
+    """Yield the encoded export ``name`` as bytes."""
+    model = EXPORTS[name][0]
+    fields = resolve_fields(name, fields)
+    encode = _encode_csv if format == "csv" else _encode_ndjson
+    parts = (
+        part.encode("utf-8") for part in encode(fields, iter_chunks(model, fields))
+    )
+    return _gzip(parts) if compress else parts
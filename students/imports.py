@@ -0,0 +1,160 @@
+"""
+Streaming bulk import of ``Result`` rows.
+
+Rows are parsed one at a time from CSV or JSON-lines input, validated against
+preloaded sets of student, course and semester ids, and written in chunked
+transactions with ``bulk_create`` / ``bulk_update``. A row that matches an
+existing result for the same student, course and semester updates it.
+"""
+import csv
+import json
+import time
+from itertools import islice
+
+from django.db import transaction
+from .aggregates import rebuild_semester_results
+from .models import Course, Result, Semester, SemesterResult, Student
+from .signals import results_published
+
+DEGREE_FIELDS = ("work_degree", "semifinal_degree", "final_degree")
+REFERENCE_FIELDS = ("student", "course", "semester")
+MAX_REPORTED_ERRORS = 100
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    def add_error(self, row_number, message):
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self):
+        return {
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.rows - self.created - self.updated,
+            "errors": self.errors,
+            "seconds": round(self.seconds, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def read_csv(lines):
+    return csv.DictReader(lines)
+
+
+def read_jsonl(lines):
+    for line in lines:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+READERS = {"csv": read_csv, "jsonl": read_jsonl}
+
+
+def _parse_row(row, student_ids, course_ids, semester_ids):
+    if not isinstance(row, dict):
+        raise ValueError("malformed row")
+    values = {}
+    for field in REFERENCE_FIELDS + DEGREE_FIELDS:
+        try:
+            values[field] = int(row[field])
+        except KeyError:
+            raise ValueError(f"missing {field}")
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be an integer")
+    for field, known in zip(
+        REFERENCE_FIELDS, (student_ids, course_ids, semester_ids)
+    ):
+        if values[field] not in known:
+            raise ValueError(f"unknown {field} {values[field]}")
+    if any(values[field] < 0 for field in DEGREE_FIELDS):
+        raise ValueError("degrees must not be negative")
+    return values
+
+
+def _write_batch(batch, report):
+    keys = {(row["student"], row["course"], row["semester"]) for row in batch}
+    existing = {
+        (result.student_id, result.course_id, result.semester_id): result
+        for result in Result.objects.filter(
+            student__in={key[0] for key in keys},
+            semester__in={key[2] for key in keys},
+        )
+        if (result.student_id, result.course_id, result.semester_id) in keys
+    }
+    to_create = {}
+    to_update = {}
+    for row in batch:
+        key = (row["student"], row["course"], row["semester"])
+        result = existing.get(key) or to_create.get(key)
+        if result is None:
+            result = to_create[key] = Result(
+                student_id=row["student"],
+                course_id=row["course"],
+                semester_id=row["semester"],
+            )
+        elif key in existing:
+            to_update[key] = result
+        for field in DEGREE_FIELDS:
+            setattr(result, field, row[field])
+        # Result.save() is bypassed, so total_degree is computed here
+        result.total_degree = sum(row[field] for field in DEGREE_FIELDS)
+    with transaction.atomic():
+        Result.objects.bulk_create(to_create.values())
+        Result.objects.bulk_update(
+            to_update.values(), DEGREE_FIELDS + ("total_degree",)
+        )
+        # bulk writes send no signals, so refresh the touched aggregates here
+        rebuild_semester_results(
+            SemesterResult.objects.filter(
+                student__in={key[0] for key in keys},
+                semester__in={key[2] for key in keys},
+            )
+        )
+    report.created += len(to_create)
+    report.updated += len(batch) - len(to_create)
+
+
+def import_results(rows, batch_size=1000):
+    """Import an iterable of row mappings and return an ``ImportReport``."""
+    report = ImportReport()
+    started = time.perf_counter()
+    student_ids = set(Student.objects.values_list("pk", flat=True))
+    course_ids = set(Course.objects.values_list("pk", flat=True))
+    semester_ids = set(Semester.objects.values_list("pk", flat=True))
+    semesters = set()
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        batch = []
+        for row in chunk:
+            report.rows += 1
+            try:
+                batch.append(
+                    _parse_row(row, student_ids, course_ids, semester_ids)
+                )
+            except ValueError as error:
+                report.add_error(report.rows, str(error))
+        if batch:
+            _write_batch(batch, report)
+            semesters.update(row["semester"] for row in batch)
+    report.seconds = time.perf_counter() - started
+    if semesters:
+        results_published.send(sender=Result, semester_ids=sorted(semesters))
+    return report
@@ -0,0 +1,27 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from students.exports import EXPORTS, FORMATS, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream a table export as CSV or NDJSON, optionally gzip-compressed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(EXPORTS))
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--fields", help="comma separated columns to export")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--output", "-o", help="output file (default: stdout)")
+
+    def handle(self, *args, name, format, fields, gzip, output, **options):
+        fields = [field.strip() for field in fields.split(",")] if fields else None
+        try:
+            parts = stream_export(name, format, fields, gzip)
+        except ValueError as error:
+            raise CommandError(str(error))
+        if output:
+            with open(output, "wb") as target:
+                target.writelines(parts)
+        else:
+            sys.stdout.buffer.writelines(parts)
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from students.synthetic import DEFAULT_PASSWORD, SLOT_PAIRS, generate
+
+
+class Command(BaseCommand):
+    help = (
+        "Add a synthetic data set: students with Arabic names, teachers, courses, "
+        "lectures, enrollments, results and semester results."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("students", type=int)
+        parser.add_argument(
+            "--teachers", type=int, help="default: one per 50 students, at least 10"
+        )
+        parser.add_argument(
+            "--courses", type=int, help="default: one per 20 students, at least 10"
+        )
+        parser.add_argument("--semesters", type=int, default=4)
+        parser.add_argument(
+            "--courses-per-student",
+            type=int,
+            default=5,
+            help=f"at most {SLOT_PAIRS}",
+        )
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--password",
+            default=DEFAULT_PASSWORD,
+            help="shared by every generated student (hashed once)",
+        )
+
+    def handle(self, *args, students, **options):
+        started = time.perf_counter()
+        try:
+            created = generate(
+                students,
+                teachers=options["teachers"],
+                courses=options["courses"],
+                semesters=options["semesters"],
+                courses_per_student=options["courses_per_student"],
+                batch_size=options["batch_size"],
+                seed=options["seed"],
+                password=options["password"],
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        for model, count in created.items():
+            self.stdout.write(f"{model}: {count}")
+        self.stdout.write(f"generated in {time.perf_counter() - started:.1f}s")
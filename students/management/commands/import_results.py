@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from students.imports import READERS, import_results
+
+
+class Command(BaseCommand):
+    help = "Stream Result rows from a CSV or JSON-lines file into the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="input file, or - for stdin")
+        parser.add_argument(
+            "--format",
+            choices=sorted(READERS),
+            help="input format (default: taken from the file extension)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, path, format=None, batch_size, **options):
+        if format is None:
+            format = "csv" if path.endswith(".csv") else "jsonl"
+        if path == "-":
+            report = import_results(READERS[format](sys.stdin), batch_size)
+        else:
+            if not Path(path).is_file():
+                raise CommandError(f"no such file: {path}")
+            with open(path, newline="", encoding="utf-8") as lines:
+                report = import_results(READERS[format](lines), batch_size)
+        for error in report.errors:
+            self.stderr.write(f"row {error['row']}: {error['error']}")
+        self.stdout.write(
+            f"{report.rows} rows: {report.created} created, "
+            f"{report.updated} updated, "
+            f"{report.rows - report.created - report.updated} failed "
+            f"in {report.seconds:.2f}s ({report.rows_per_second:.0f} rows/s)"
+        )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from students.models import Result, Semester
+from students.signals import results_published
+
+
+class Command(BaseCommand):
+    help = "Announce that a semester's results are final, warming dependent caches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("semester_ids", nargs="+", type=int)
+
+    def handle(self, *args, semester_ids, **options):
+        found = set(
+            Semester.objects.filter(pk__in=semester_ids).values_list("pk", flat=True)
+        )
+        missing = sorted(set(semester_ids) - found)
+        if missing:
+            raise CommandError(f"unknown semester ids: {missing}")
+        results_published.send(sender=Result, semester_ids=sorted(found))
+        self.stdout.write(f"published results of semesters {sorted(found)}")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from students.aggregates import rebuild_semester_results
+
+
+class Command(BaseCommand):
+    help = "Recompute every SemesterResult total, average and GPA from its results."
+
+    def handle(self, *args, **options):
+        updated = rebuild_semester_results()
+        self.stdout.write(f"rebuilt {updated} semester results")
@@ -0,0 +1,27 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from api.cache import bump_version
+from api.replicas import SYNC_RESOURCE
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database into every configured replica file."
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("no replicas configured (set UNIAPI_SQLITE_REPLICAS)")
+        primary = connections["default"]
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            connections[alias].close()
+            replica = sqlite3.connect(connections[alias].settings_dict["NAME"])
+            try:
+                primary.connection.backup(replica)
+            finally:
+                replica.close()
+            self.stdout.write(f"synced {alias}")
+        # lists cached from the replicas before this sync are stale now
+        bump_version(SYNC_RESOURCE)
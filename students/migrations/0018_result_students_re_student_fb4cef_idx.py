@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0017_semesterresult_semester_alter_result_semester'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['student', 'semester'], name='students_re_student_fb4cef_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:44
+
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+# a copy of students.aggregates.rebuild_updates() as of this migration, so
+# later changes to that module cannot change what this migration does
+def rebuild_aggregates(apps, schema_editor):
+    Lecture = apps.get_model("students", "Lecture")
+    Result = apps.get_model("students", "Result")
+    SemesterResult = apps.get_model("students", "SemesterResult")
+    unites = Coalesce(
+        Subquery(
+            Lecture.objects.filter(course=OuterRef("course"))
+            .values("course")
+            .annotate(unites=Sum("unites"))
+            .values("unites")
+        ),
+        Value(0),
+    )
+    results = (
+        Result.objects.filter(
+            student=OuterRef("student"), semester=OuterRef("semester")
+        )
+        .annotate(unites=unites)
+        .values("student")
+    )
+
+    def total(aggregate):
+        return Coalesce(
+            Subquery(results.annotate(value=aggregate).values("value")), Value(0)
+        )
+
+    SemesterResult.objects.update(
+        subjects_count=total(Count("id")),
+        total_degree=total(Sum("total_degree")),
+        total_unites=total(Sum("unites")),
+        weighted_degree=total(Sum(F("total_degree") * F("unites"))),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0019_enrollment_students_en_student_dc805c_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='semesterresult',
+            name='subjects_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='semesterresult',
+            name='total_unites',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='semesterresult',
+            name='weighted_degree',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(rebuild_aggregates, migrations.RunPython.noop),
+    ]
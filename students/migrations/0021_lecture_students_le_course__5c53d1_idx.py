@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0020_semesterresult_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lecture',
+            index=models.Index(fields=['course', 'lecture_time'], name='students_le_course__5c53d1_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_enrollments(apps, schema_editor):
+    Course = apps.get_model("students", "Course")
+    Enrollment = apps.get_model("students", "Enrollment")
+    Course.objects.update(
+        enrolled_count=Coalesce(
+            Subquery(
+                Enrollment.objects.filter(course=OuterRef("pk"))
+                .values("course")
+                .annotate(count=Count("id"))
+                .values("count")
+            ),
+            Value(0),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0021_lecture_students_le_course__5c53d1_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='capacity',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='enrolled_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_enrollments, migrations.RunPython.noop),
+    ]
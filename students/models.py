@@ -1,5 +1,5 @@
 from typing import Iterable, Optional
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -104,23 +104,92 @@ class Student(AbstractBaseUser, PermissionsMixin):
         return f"{self.serial_number}:{self.first_name} {self.last_name}"
 
 
+class CourseFull(Exception):
+    pass
+
+
 class Course(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=10)
     teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE)
     students = models.ManyToManyField(Student, through="Enrollment")
+    # no capacity means no limit
+    capacity = models.PositiveIntegerField(null=True, blank=True)
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self) -> str:
         return f"{self.code}:{self.name}"
 
+    def save(self, *args, **kwargs) -> None:
+        # enrolled_count only moves through UPDATEs such as reserve_seat's; a
+        # save from a stale copy, such as the admin change form's, would
+        # overwrite it with the count it was loaded with
+        if not self._state.adding:
+            update_fields = kwargs.get("update_fields")
+            if update_fields is None:
+                update_fields = [
+                    field.name
+                    for field in self._meta.concrete_fields
+                    if not field.primary_key
+                ]
+            kwargs["update_fields"] = [
+                name for name in update_fields if name != "enrolled_count"
+            ]
+        return super().save(*args, **kwargs)
+
+    @classmethod
+    def reserve_seat(cls, course_id) -> bool:
+        """
+        Count one more enrollment if the course has room, in a single
+        conditional UPDATE so concurrent enrollments cannot oversubscribe it.
+        """
+        return bool(
+            cls.objects.filter(pk=course_id)
+            .filter(
+                models.Q(capacity__isnull=True)
+                | models.Q(enrolled_count__lt=models.F("capacity"))
+            )
+            .update(enrolled_count=models.F("enrolled_count") + 1)
+        )
+
+    @classmethod
+    def release_seat(cls, course_id) -> None:
+        cls.objects.filter(pk=course_id, enrolled_count__gt=0).update(
+            enrolled_count=models.F("enrolled_count") - 1
+        )
+
 
 class Enrollment(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
     date_enrolled = models.DateField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["student", "course"])]
+
+    def save(self, *args, **kwargs) -> None:
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "course" not in update_fields:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            previous_course_id = None
+            if not self._state.adding:
+                previous_course_id = (
+                    Enrollment.objects.filter(pk=self.pk)
+                    .values_list("course_id", flat=True)
+                    .first()
+                )
+                if previous_course_id == self.course_id:
+                    return super().save(*args, **kwargs)
+            # a new enrollment, or one moved to another course, e.g. in the admin
+            if not Course.reserve_seat(self.course_id):
+                raise CourseFull(f"course {self.course_id} is full")
+            if previous_course_id is not None:
+                Course.release_seat(previous_course_id)
+            return super().save(*args, **kwargs)
+
     def __str__(self) -> str:
-        return f"{Course.objects.get(pk=self.course.pk)}:{Student.objects.get(pk=self.student.pk)}"
+        return f"{self.course}:{self.student}"
 
 
 class Lecture(models.Model):
@@ -129,6 +198,9 @@ class Lecture(models.Model):
     unites = models.IntegerField()
     lecture_time = models.ForeignKey("LectureTime", on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [models.Index(fields=["course", "lecture_time"])]
+
     def __str__(self) -> str:
         return f"{self.course.name}:{self.title}"
 
@@ -179,23 +251,65 @@ class Result(models.Model):
     final_degree = models.IntegerField()
     total_degree = models.IntegerField()
 
+    class Meta:
+        indexes = [models.Index(fields=["student", "semester"])]
+
     def __str__(self) -> str:
         return f"{self.course.name}:{self.total_degree}"
 
+    AGGREGATE_FIELDS = {"student_id", "semester_id", "course_id", "total_degree"}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember what the aggregates in SemesterResult currently count; with
+        # any of those fields deferred, reading it would refresh_from_db(),
+        # which calls from_db() again, so the signals load the key instead
+        if instance.get_deferred_fields().isdisjoint(cls.AGGREGATE_FIELDS):
+            instance._aggregated = instance.aggregate_key()
+        return instance
+
+    def aggregate_key(self):
+        return (self.student_id, self.semester_id, self.course_id, self.total_degree)
+
     def save(self, *args, **kwargs) -> None:
         self.total_degree = self.work_degree + self.semifinal_degree + self.final_degree
         return super().save(*args, **kwargs)
 
 
 class SemesterResult(models.Model):
+    """
+    A student's results for one semester.
+
+    The aggregate columns cover every ``Result`` of the same student and
+    semester and are kept up to date by ``students.aggregates``. A course is
+    worth the sum of its lectures' ``unites``.
+    """
+
     student = models.ForeignKey(Student, on_delete=models.CASCADE)
     subjects = models.ManyToManyField(to=Result, default=None)
     total_degree = models.PositiveIntegerField(default=0)
     semester = models.ForeignKey(Semester , on_delete=models.CASCADE)
-        
+    subjects_count = models.PositiveIntegerField(default=0)
+    total_unites = models.PositiveIntegerField(default=0)
+    weighted_degree = models.PositiveIntegerField(default=0)
+
     def __str__(self) -> str:
         return f"{self.student.first_name} {self.student.last_name}"
 
+    @property
+    def average_degree(self) -> Optional[float]:
+        if not self.subjects_count:
+            return None
+        return round(self.total_degree / self.subjects_count, 2)
+
+    @property
+    def gpa(self) -> Optional[float]:
+        """Credit-weighted average of the subjects' total degree."""
+        if not self.total_unites:
+            return None
+        return round(self.weighted_degree / self.total_unites, 2)
+
 class Post(models.Model):
     content = models.CharField(max_length=50)
     image_link = models.CharField(max_length=30)
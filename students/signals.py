@@ -0,0 +1,83 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
+from .aggregates import apply_result_change, rebuild_semester_results
+from .models import Course, Enrollment, Lecture, Result, SemesterResult
+
+# sent with ``semester_ids`` once a batch of results is final, e.g. after an import
+results_published = Signal()
+
+
+def _stored_aggregate_key(instance):
+    return (
+        Result.objects.filter(pk=instance.pk)
+        .values_list("student", "semester", "course", "total_degree")
+        .first()
+    )
+
+
+@receiver(pre_save, sender=Result)
+def result_saving(sender, instance, **kwargs):
+    # loaded with an aggregate field deferred, see Result.from_db()
+    if not instance._state.adding and not hasattr(instance, "_aggregated"):
+        instance._aggregated = _stored_aggregate_key(instance)
+
+
+@receiver(post_save, sender=Result)
+def result_saved(sender, instance, **kwargs):
+    new = instance.aggregate_key()
+    apply_result_change(getattr(instance, "_aggregated", None), new)
+    instance._aggregated = new
+
+
+@receiver(pre_delete, sender=Result)
+def result_deleting(sender, instance, **kwargs):
+    if not hasattr(instance, "_aggregated"):
+        instance._aggregated = _stored_aggregate_key(instance)
+        if instance._aggregated is not None:
+            # deferred fields cannot be loaded once the row is gone
+            (
+                instance.student_id,
+                instance.semester_id,
+                instance.course_id,
+                instance.total_degree,
+            ) = instance._aggregated
+
+
+@receiver(post_delete, sender=Result)
+def result_deleted(sender, instance, **kwargs):
+    apply_result_change(instance._aggregated, None)
+
+
+@receiver(post_save, sender=SemesterResult)
+def semester_result_saved(sender, instance, created, **kwargs):
+    if created:
+        rebuild_semester_results(SemesterResult.objects.filter(pk=instance.pk))
+
+
+@receiver(pre_save, sender=Lecture)
+def lecture_moving(sender, instance, **kwargs):
+    if instance.pk is not None:
+        instance._previous_course_id = (
+            Lecture.objects.filter(pk=instance.pk)
+            .values_list("course", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Lecture)
+@receiver(post_delete, sender=Lecture)
+def lecture_changed(sender, instance, **kwargs):
+    # course units changed, so every weighted aggregate with that course is
+    # stale, and so is every one with the course a moved lecture left
+    courses = {instance.course_id, getattr(instance, "_previous_course_id", None)}
+    stale = SemesterResult.objects.filter(
+        student__result__course__in=courses - {None},
+        student__result__semester=F("semester"),
+    )
+    rebuild_semester_results(SemesterResult.objects.filter(pk__in=stale.values("pk")))
+
+
+@receiver(post_delete, sender=Enrollment)
+def enrollment_deleted(sender, instance, **kwargs):
+    Course.release_seat(instance.course_id)
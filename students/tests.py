@@ -1,3 +1,1440 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import pstats
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from knox.models import AuthToken
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from api import profiling, replicas, views
+from api.cache import auth_cache, get_version, response_cache, shared_cache
+from api.profiling import list_profiles, profile_path
+from api.rows import RowSerializer
+from api.serializers import (
+    CourseSerializer,
+    ResultSerializer,
+    SemesterSerializer,
+    StudentSecondaryDetailsSerializer,
+    StudentSerializer,
+)
+from .models import (
+    Course,
+    CourseFull,
+    Enrollment,
+    Lecture,
+    LectureTime,
+    Result,
+    Semester,
+    SemesterResult,
+    Student,
+    Teacher,
+)
+from .synthetic import generate
+from .timetable import timetable
 
 # Create your tests here.
+
+
+def make_student(serial_number, **extra_fields):
+    # no password, hashing one makes the tests crawl
+    return Student.objects.create_user(
+        serial_number, first_name=f"first{serial_number}", **extra_fields
+    )
+
+
+# caches every worker process shares, and the variables that locate them
+SHARED_CACHE_DIRS = {
+    "shared": "UNIAPI_SHARED_CACHE_DIR",
+    "pins": "UNIAPI_PIN_CACHE_DIR",
+    "transcripts": "UNIAPI_TRANSCRIPT_CACHE_DIR",
+}
+
+
+def use_temp_shared_cache(test):
+    # not BASE_DIR/.cache, which a local server may be using
+    caches = dict(settings.CACHES)
+    for alias in SHARED_CACHE_DIRS:
+        directory = tempfile.TemporaryDirectory()
+        test.addCleanup(directory.cleanup)
+        caches[alias] = {**caches[alias], "LOCATION": directory.name}
+    overrides = override_settings(CACHES=caches)
+    overrides.enable()
+    test.addCleanup(overrides.disable)
+
+
+def manage_in_another_process(*args, database=None):
+    # as another worker process or a cron job would, sharing the test's cache
+    # directories and, if given, a copy of its database
+    env = {
+        **os.environ,
+        **{
+            variable: str(settings.CACHES[alias]["LOCATION"])
+            for alias, variable in SHARED_CACHE_DIRS.items()
+        },
+    }
+    if database is not None:
+        env["UNIAPI_SQLITE_NAME"] = database
+    subprocess.run(
+        [sys.executable, "manage.py", *args],
+        cwd=settings.BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+
+def run_in_another_process(code):
+    manage_in_another_process("shell", "-c", code)
+
+
+def bump_version_in_another_process(resource):
+    run_in_another_process(
+        f"from api.cache import bump_version; bump_version({resource!r})"
+    )
+
+
+class ResultListTests(TestCase):
+    def setUp(self):
+        self.student = make_student(1)
+        self.other = make_student(2)
+        self.teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        self.fall = Semester.objects.create(season="F", year=2023)
+        self.spring = Semester.objects.create(season="S", year=2024)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def add_results(self, count, semester=None):
+        for index in range(count):
+            course = Course.objects.create(
+                name=f"course{index}", code=f"C{index}", teacher=self.teacher
+            )
+            for student in (self.student, self.other):
+                Result.objects.create(
+                    course=course,
+                    student=student,
+                    semester=semester or self.fall,
+                    work_degree=10,
+                    semifinal_degree=20,
+                    final_degree=30,
+                )
+
+    def test_lists_only_own_results(self):
+        self.add_results(3)
+        response = self.client.get("/results/")
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"]
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(item["student"] == 1 for item in results))
+        self.assertEqual(results[0]["total_degree"], 60)
+        self.assertEqual(results[0]["course_name"], "course0")
+
+    def test_query_count_is_constant(self):
+        self.add_results(1)
+        with self.assertNumQueries(1):
+            self.client.get("/results/")
+        self.add_results(20)
+        with self.assertNumQueries(1):
+            response = self.client.get("/results/")
+        self.assertEqual(len(response.data["results"]), 21)
+
+    def test_semester_and_course_filters(self):
+        self.add_results(2)
+        self.add_results(1, semester=self.spring)
+        response = self.client.get("/results/", {"semester": self.spring.pk})
+        self.assertEqual(len(response.data["results"]), 1)
+        course = response.data["results"][0]["course"]
+        response = self.client.get("/results/", {"course": course})
+        results = response.data["results"]
+        self.assertEqual([item["course"] for item in results], [course])
+
+    def test_invalid_filter(self):
+        response = self.client.get("/results/", {"semester": "x"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SemesterResultListTests(TestCase):
+    def setUp(self):
+        self.student = make_student(1)
+        other = make_student(2)
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        for year in (2022, 2023, 2024):
+            semester = Semester.objects.create(season="F", year=year)
+            for student in (self.student, other):
+                sem_result = SemesterResult.objects.create(
+                    student=student, semester=semester
+                )
+                for index in range(3):
+                    course = Course.objects.create(
+                        name=f"course{index}", code=f"C{index}", teacher=teacher
+                    )
+                    sem_result.subjects.add(
+                        Result.objects.create(
+                            course=course,
+                            student=student,
+                            semester=semester,
+                            work_degree=10,
+                            semifinal_degree=20,
+                            final_degree=30,
+                        )
+                    )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_subject_ids_are_prefetched(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/semresult/")
+        results = response.data["results"]
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(item["student"] == 1 for item in results))
+        self.assertEqual(len(results[0]["subjects"]), 3)
+
+    def test_expanded_subjects(self):
+        with self.assertNumQueries(2):
+            response = self.client.get("/semresult/", {"expand": "subjects"})
+        subject = response.data["results"][0]["subjects"][0]
+        self.assertEqual(subject["course_name"], "course0")
+        self.assertEqual(subject["total_degree"], 60)
+
+
+class EnrollmentListTests(TestCase):
+    def setUp(self):
+        self.student = make_student(1)
+        other = make_student(2)
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        for index in range(5):
+            course = Course.objects.create(
+                name=f"course{index}", code=f"C{index}", teacher=teacher
+            )
+            Enrollment.objects.create(student=self.student, course=course)
+            Enrollment.objects.create(student=other, course=course)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_pages_through_own_enrollments(self):
+        response = self.client.get("/enrollment/", {"page_size": 2})
+        seen = []
+        while True:
+            self.assertEqual(response.status_code, 200)
+            seen += response.data["results"]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(len(seen), 5)
+        self.assertTrue(all(item["student"] == 1 for item in seen))
+
+    def test_expanded_course(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/enrollment/", {"expand": "course"})
+        self.assertEqual(response.data["results"][0]["course_name"], "course0")
+        self.assertEqual(response.data["results"][0]["course_code"], "C0")
+
+
+class CourseListTests(TestCase):
+    def setUp(self):
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        self.courses = [
+            Course.objects.create(
+                name=f"course{index}", code=f"C{index}", teacher=teacher
+            )
+            for index in range(3)
+        ]
+        for serial_number in range(1, 8):
+            student = make_student(serial_number)
+            Enrollment.objects.create(student=student, course=self.courses[0])
+        self.client = APIClient()
+        self.client.force_authenticate(student)
+
+    def test_catalog_counts_enrollments(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/courses/")
+        counts = [item["students_count"] for item in response.data["results"]]
+        self.assertEqual(counts, [7, 0, 0])
+        self.assertNotIn("students", response.data["results"][0])
+
+    def test_roster_is_paginated(self):
+        url = f"/courses/{self.courses[0].pk}/students/"
+        response = self.client.get(url, {"page_size": 5})
+        self.assertEqual(len(response.data["results"]), 5)
+        response = self.client.get(response.data["next"])
+        serials = [item["serial_number"] for item in response.data["results"]]
+        self.assertEqual(serials, [6, 7])
+        self.assertEqual(self.client.get("/courses/999/students/").status_code, 404)
+
+
+class StudentProfileCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        use_temp_shared_cache(self)
+        self.student = make_student(1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_profile_is_cached_until_student_is_saved(self):
+        first = self.client.get("/student/main/")
+        self.assertEqual(first.data["first_name"], "first1")
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/student/main/").data, first.data)
+
+        self.student.first_name = "renamed"
+        self.student.save()
+        response = self.client.get("/student/main/")
+        self.assertEqual(response.data["first_name"], "renamed")
+
+    def test_save_in_another_process_evicts(self):
+        self.client.get("/student/main/")
+        # the UPDATE another worker commits, and its student_changed receiver
+        Student.objects.filter(pk=1).update(first_name="renamed")
+        run_in_another_process(
+            "from api.cache import invalidate_student_profile; "
+            "invalidate_student_profile(1)"
+        )
+        response = self.client.get("/student/main/")
+        self.assertEqual(response.data["first_name"], "renamed")
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.students = [make_student(serial_number) for serial_number in (1, 2, 3)]
+
+    def get(self, **params):
+        request = APIRequestFactory().get("/student/", params)
+        force_authenticate(request, self.students[0])
+        return views.student(request)
+
+    def test_list_skips_hidden_relations(self):
+        with self.assertNumQueries(1):
+            response = self.get()
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertNotIn("groups", response.data["results"][0])
+        self.assertNotIn("is_staff", response.data["results"][0])
+
+    def test_fields_and_exclude(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(
+                fields="serial_number,first_name,email", exclude="email"
+            )
+        self.assertEqual(
+            response.data["results"][0], {"serial_number": 1, "first_name": "first1"}
+        )
+        self.assertNotIn('"last_name"', queries[0]["sql"])
+        self.assertEqual(self.get(fields="groups").status_code, 400)
+        self.assertEqual(self.get(exclude="nope").status_code, 400)
+
+    def test_profiles_are_projections(self):
+        client = APIClient()
+        client.force_authenticate(self.students[0])
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get("/student/secondary/")
+        self.assertEqual(
+            set(response.data), set(StudentSecondaryDetailsSerializer.Meta.fields)
+        )
+        self.assertNotIn('"first_name"', queries[-1]["sql"])
+
+
+class RowSerializerTests(TestCase):
+    def test_matches_model_serializers(self):
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        make_student(
+            1,
+            last_name="لبيب",
+            date_of_birth="2001-02-03",
+            gender="F",
+            supervisor=teacher,
+        )
+        make_student(2)
+        course = Course.objects.create(name="c", code="C", teacher=teacher, capacity=3)
+        Course.objects.create(name="d", code="D", teacher=teacher)
+        Result.objects.create(
+            course=course,
+            student_id=1,
+            semester=Semester.objects.create(season="F", year=2023),
+            work_degree=10,
+            semifinal_degree=20,
+            final_degree=30,
+        )
+        renderer = JSONRenderer()
+        for serializer_class, queryset in (
+            (StudentSerializer, Student.objects.order_by("pk")),
+            (CourseSerializer, Course.objects.order_by("pk")),
+            (ResultSerializer, Result.objects.order_by("pk")),
+        ):
+            with self.subTest(serializer=serializer_class.__name__):
+                expected = serializer_class(queryset, many=True).data
+                rows = RowSerializer(serializer_class())
+                self.assertEqual(
+                    renderer.render(rows.from_dicts(rows.values(queryset))),
+                    renderer.render(expected),
+                )
+                self.assertEqual(
+                    renderer.render(rows.from_tuples(rows.values_list(queryset))),
+                    renderer.render(expected),
+                )
+
+    def test_rejects_relations(self):
+        with self.assertRaises(ImproperlyConfigured):
+            RowSerializer(SemesterSerializer())
+
+
+class SyntheticDataTests(TestCase):
+    def test_generate_is_consistent(self):
+        created = generate(40, courses_per_student=3, batch_size=15)
+        self.assertEqual(created["Student"], 40)
+        self.assertEqual(created["Enrollment"], 120)
+        self.assertEqual(
+            sum(Course.objects.values_list("enrolled_count", flat=True)), 120
+        )
+        self.assertEqual(
+            sum(SemesterResult.objects.values_list("subjects_count", flat=True)), 120
+        )
+        student = Student.objects.get(pk=1)
+        self.assertTrue(student.arabic_first_name)
+        self.assertTrue(student.check_password("password"))
+        slots = [
+            len(lectures)
+            for day in timetable(student).values()
+            for lectures in day.values()
+        ]
+        self.assertEqual(max(slots), 1)
+        self.assertEqual(sum(slots), 6)
+
+
+class AdminChangelistTests(TestCase):
+    def setUp(self):
+        self.client.force_login(Student.objects.create_superuser(1000, "secret"))
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        self.course = Course.objects.create(name="c", code="C", teacher=teacher)
+        self.semester = Semester.objects.create(season="F", year=2023)
+        self.serial_number = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            self.serial_number += 1
+            student = make_student(self.serial_number)
+            Enrollment.objects.create(student=student, course=self.course)
+            Result.objects.create(
+                course=self.course,
+                student=student,
+                semester=self.semester,
+                work_degree=1,
+                semifinal_degree=1,
+                final_degree=1,
+            )
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_rows(3)
+        few = {
+            url: self.changelist_queries(url)
+            for url in ("/admin/students/enrollment/", "/admin/students/result/")
+        }
+        self.add_rows(40)
+        for url, count in few.items():
+            self.assertEqual(self.changelist_queries(url), count)
+
+    def test_student_count_ignores_serial_numbers(self):
+        make_student(17110027)
+        response = self.client.get("/admin/students/student/")
+        # the superuser and the student above
+        self.assertEqual(response.context["cl"].paginator.count, 2)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        auth_cache.clear()
+        use_temp_shared_cache(self)
+        self.student = make_student(1)
+        _, token = AuthToken.objects.create(self.student)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token}")
+
+    def test_cached_token_skips_auth_queries(self):
+        self.assertEqual(self.client.get("/enrollment/").status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/enrollment/").status_code, 200)
+
+    def test_logout_invalidates(self):
+        self.client.get("/enrollment/")
+        self.assertEqual(self.client.post("/logout/").status_code, 204)
+        self.assertEqual(self.client.get("/enrollment/").status_code, 401)
+
+    def test_logout_all_invalidates(self):
+        self.client.get("/enrollment/")
+        self.assertEqual(self.client.post("/logoutall/").status_code, 204)
+        self.assertEqual(self.client.get("/enrollment/").status_code, 401)
+
+    def test_deactivation_invalidates(self):
+        self.client.get("/enrollment/")
+        self.student.is_active = False
+        self.student.save()
+        self.assertEqual(self.client.get("/enrollment/").status_code, 401)
+
+    def test_logout_in_another_process_invalidates(self):
+        self.client.get("/enrollment/")
+        # the DELETE another worker commits, and its auth_token_deleted receiver
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {AuthToken._meta.db_table}")
+        run_in_another_process(
+            "from api.cache import revoke_auth_tokens; revoke_auth_tokens(1)"
+        )
+        self.assertEqual(self.client.get("/enrollment/").status_code, 401)
+
+
+@override_settings(DATABASE_REPLICAS=["default"])
+class ReplicaRoutingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        use_temp_shared_cache(self)
+        response_cache.clear()
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        self.course = Course.objects.create(name="c", code="C", teacher=teacher)
+        self.student = make_student(1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def routed_to_replica(self, url):
+        with mock.patch.object(
+            replicas.random, "choice", wraps=replicas.random.choice
+        ) as choice:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return choice.called
+
+    def test_catalog_reads_use_replica(self):
+        self.assertTrue(self.routed_to_replica("/courses/"))
+        self.assertFalse(self.routed_to_replica("/enrollment/"))
+
+    def test_writes_pin_student_to_primary(self):
+        response = self.client.post(
+            "/enroll/bulk/", {"courses": [self.course.pk]}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(replicas.is_pinned(self.student.pk))
+        self.assertFalse(self.routed_to_replica("/courses/"))
+        replicas.pin_cache.clear()
+        response_cache.clear()
+        self.assertTrue(self.routed_to_replica("/courses/"))
+
+    def test_expired_pins_are_culled_apart_from_stamps(self):
+        stamp = get_version("course")
+        pins = {**settings.CACHES["pins"], "OPTIONS": {"MAX_ENTRIES": 3}}
+        with override_settings(CACHES={**settings.CACHES, "pins": pins}):
+            replicas.pin_to_primary(1)
+            with override_settings(REPLICA_PIN_SECONDS=0):
+                replicas.pin_to_primary(2)
+                replicas.pin_to_primary(3)
+            replicas.pin_to_primary(4)
+            self.assertEqual(len(os.listdir(pins["LOCATION"])), 2)
+            self.assertTrue(replicas.is_pinned(1))
+            self.assertTrue(replicas.is_pinned(4))
+        self.assertEqual(get_version("course"), stamp)
+
+    def test_router_keeps_writes_on_primary(self):
+        router = replicas.ReplicaRouter()
+        token = replicas._replica_reads.set(True)
+        try:
+            with override_settings(DATABASE_REPLICAS=["replica1"]):
+                self.assertEqual(router.db_for_read(Course), "replica1")
+                self.assertEqual(router.db_for_write(Course), "default")
+        finally:
+            replicas._replica_reads.reset(token)
+        self.assertEqual(router.db_for_read(Course), "default")
+
+
+class ReplicaFileTests(TransactionTestCase):
+    """A second SQLite file as the replica, filled by ``sync_replicas``."""
+
+    ALIAS = "replica_test"
+
+    def setUp(self):
+        cache.clear()
+        use_temp_shared_cache(self)
+        response_cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings[self.ALIAS] = {
+            **connections.settings["default"],
+            "NAME": os.path.join(directory.name, "replica.sqlite3"),
+        }
+        self.addCleanup(self.remove_replica)
+        overrides = override_settings(DATABASE_REPLICAS=[self.ALIAS])
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        Course.objects.create(name="a", code="A", teacher=self.teacher)
+        self.sync()
+        self.student = make_student(1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def remove_replica(self):
+        connections[self.ALIAS].close()
+        del connections[self.ALIAS]
+        del connections.settings[self.ALIAS]
+
+    def sync(self):
+        call_command("sync_replicas", stdout=io.StringIO())
+
+    def course_codes(self, response):
+        return [course["code"] for course in response.data["results"]]
+
+    def test_lists_cached_from_a_lagging_replica_expire_on_sync(self):
+        self.client.get("/courses/")
+        Course.objects.create(name="b", code="B", teacher=self.teacher)
+        response = self.client.get("/courses/")
+        # the catalog stamp moved, but the replica has not seen the write yet
+        self.assertEqual(self.course_codes(response), ["A"])
+
+        self.sync()
+        response = self.client.get("/courses/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.course_codes(response), ["A", "B"])
+
+    def test_primary_readers_never_get_replica_lists(self):
+        Course.objects.create(name="b", code="B", teacher=self.teacher)
+        replica_list = self.client.get("/courses/")
+        self.assertEqual(self.course_codes(replica_list), ["A"])
+
+        replicas.pin_to_primary(self.student.pk)
+        response = self.client.get(
+            "/courses/", HTTP_IF_NONE_MATCH=replica_list["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.course_codes(response), ["A", "B"])
+
+
+@override_settings(QUERY_STATS_SAMPLE_RATE=1, QUERY_STATS_N_PLUS_ONE=5)
+class QueryStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        use_temp_shared_cache(self)
+        response_cache.clear()
+        self.student = make_student(1)
+        for year in range(2000, 2012):
+            Semester.objects.create(season="F", year=year)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def server_timing(self, response):
+        return dict(
+            metric.split(";", 1) for metric in response["Server-Timing"].split(", ")
+        )
+
+    def test_server_timing_counts_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/enrollment/")
+        timing = self.server_timing(response)
+        self.assertEqual(timing["db-queries"], f'desc="{len(queries)}"')
+        self.assertTrue(timing["db"].startswith("dur="))
+        self.assertEqual(timing["db-duplicates"], 'desc="0"')
+
+    def test_repeated_template_is_flagged(self):
+        with self.assertLogs("api.querystats", "WARNING") as logs:
+            response = self.client.get("/semester/")
+        self.assertEqual(response.status_code, 200)
+        timing = self.server_timing(response)
+        self.assertNotEqual(timing["db-duplicates"], 'desc="0"')
+        self.assertIn(
+            "suspected N+1 in api.views.SemesterViewSet: 12 x", logs.output[0]
+        )
+
+    @override_settings(QUERY_STATS_MAX_QUERIES=1)
+    def test_logs_requests_over_query_threshold(self):
+        with self.assertLogs("api.querystats", "WARNING") as logs:
+            self.client.get("/enrollment/")
+        self.assertIn(
+            "GET /enrollment/ (api.views.EnrollmentViewSet)", logs.output[0]
+        )
+
+    @override_settings(QUERY_STATS_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        self.assertFalse(self.client.get("/enrollment/").has_header("Server-Timing"))
+
+
+class ProfilerTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        overrides = override_settings(
+            PROFILER_DIR=directory.name, PROFILER_SAMPLE_RATE=0
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.staff = make_student(1, is_staff=True)
+        self.client = self.token_client(self.staff)
+
+    def token_client(self, student):
+        # the middleware sees real credentials only, not force_authenticate()
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Token {AuthToken.objects.create(student)[1]}"
+        )
+        return client
+
+    def test_staff_request_is_profiled_and_listed(self):
+        response = self.client.get("/enrollment/", HTTP_X_PROFILE="1")
+        profile_id = int(response["X-Profile-Id"])
+        [profile] = list_profiles()
+        self.assertEqual(profile["id"], profile_id)
+        self.assertEqual(profile["path"], "/enrollment/")
+        self.assertEqual(profile["user"], self.staff.pk)
+        self.assertEqual(profile["trigger"], "requested")
+        self.assertIsNotNone(pstats.Stats(str(profile_path(profile_id))))
+
+        admin_client = Client()
+        admin_client.force_login(self.staff)
+        page = admin_client.get("/admin/profiles/", {"o": "latency"})
+        self.assertContains(page, "GET /enrollment/")
+        download = admin_client.get(f"/admin/profiles/{profile_id}/")
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(
+            b"".join(download.streaming_content),
+            profile_path(profile_id).read_bytes(),
+        )
+
+    def test_others_are_never_profiled(self):
+        student = self.token_client(make_student(2))
+        with mock.patch.object(profiling.cProfile, "Profile") as profiler:
+            response = student.get("/enrollment/?_profile=1")
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header("X-Profile-Id"))
+            anonymous = APIClient().get("/enrollment/", HTTP_X_PROFILE="1")
+            self.assertEqual(anonymous.status_code, 401)
+            invalid = APIClient().get(
+                "/enrollment/?_profile", HTTP_AUTHORIZATION="Token nope"
+            )
+            self.assertEqual(invalid.status_code, 401)
+        profiler.assert_not_called()
+        self.assertEqual(list_profiles(), [])
+        self.assertEqual(Client().get("/admin/profiles/").status_code, 302)
+
+    def test_session_staff_can_profile(self):
+        client = Client()
+        client.force_login(self.staff)
+        response = client.get("/admin/", HTTP_X_PROFILE="1")
+        self.assertTrue(response.has_header("X-Profile-Id"))
+
+    @override_settings(PROFILER_MAX_PROFILES=2)
+    def test_ring_buffer_keeps_newest(self):
+        ids = [
+            int(self.client.get("/enrollment/?_profile")["X-Profile-Id"])
+            for _ in range(3)
+        ]
+        kept = [profile["id"] for profile in list_profiles()]
+        self.assertEqual(kept, ids[:0:-1])
+        self.assertFalse(profile_path(ids[0]).exists())
+
+
+class BulkEnrollmentTests(TestCase):
+    def setUp(self):
+        self.student = make_student(1)
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        self.courses = [
+            Course.objects.create(name=f"c{index}", code=f"C{index}", teacher=teacher)
+            for index in range(8)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def enroll(self, courses):
+        return self.client.post("/enroll/bulk/", {"courses": courses}, format="json")
+
+    def test_outcomes(self):
+        first, second = self.courses[0].pk, self.courses[1].pk
+        Enrollment.objects.create(student=self.student, course=self.courses[0])
+        response = self.enroll([first, second, second, 999])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [item["status"] for item in response.data],
+            ["already_enrolled", "enrolled", "already_enrolled", "not_found"],
+        )
+        self.assertEqual(
+            Enrollment.objects.filter(student=self.student, course=second).count(), 1
+        )
+
+    def test_validation_query_count_is_constant(self):
+        # each enrolled course costs one seat-reserving UPDATE, reads stay fixed
+        def reads(context):
+            return [
+                query
+                for query in context.captured_queries
+                if query["sql"].startswith("SELECT")
+            ]
+
+        with CaptureQueriesContext(connection) as few:
+            self.enroll([course.pk for course in self.courses[:2]])
+        with CaptureQueriesContext(connection) as many:
+            self.enroll([course.pk for course in self.courses[2:]])
+        self.assertEqual(len(reads(few)), len(reads(many)))
+        self.assertEqual(Enrollment.objects.filter(student=self.student).count(), 8)
+
+
+class ResultImportTests(TestCase):
+    def setUp(self):
+        self.student = make_student(1)
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        self.course = Course.objects.create(name="c", code="C", teacher=teacher)
+        self.semester = Semester.objects.create(season="F", year=2023)
+        self.client = APIClient()
+        self.client.force_authenticate(Student.objects.create_superuser(1000, "x"))
+
+    def test_csv_endpoint_creates_and_updates(self):
+        ids = f"1,{self.course.pk},{self.semester.pk}"
+        body = (
+            "student,course,semester,work_degree,semifinal_degree,final_degree\n"
+            f"{ids},10,20,30\n"
+            f"{ids},15,20,30\n"
+            f"2,{self.course.pk},{self.semester.pk},1,1,1\n"
+        )
+        response = self.client.post(
+            "/results/import/", body, content_type="text/csv"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["created"], 1)
+        self.assertEqual(response.data["updated"], 1)
+        self.assertEqual(
+            response.data["errors"], [{"row": 3, "error": "unknown student 2"}]
+        )
+        self.assertEqual(Result.objects.get().total_degree, 65)
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(self.student)
+        response = self.client.post("/results/import/", "", content_type="text/csv")
+        self.assertEqual(response.status_code, 403)
+
+    def test_management_command(self):
+        row = {
+            "student": 1,
+            "course": self.course.pk,
+            "semester": self.semester.pk,
+            "work_degree": 5,
+            "semifinal_degree": 5,
+            "final_degree": 5,
+        }
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl") as source:
+            source.write(json.dumps(row) + "\nnot json\n")
+            source.flush()
+            output = io.StringIO()
+            call_command("import_results", source.name, stdout=output, stderr=output)
+        self.assertIn("2 rows: 1 created, 0 updated, 1 failed", output.getvalue())
+        self.assertEqual(Result.objects.get().total_degree, 15)
+
+
+class SemesterResultAggregateTests(TestCase):
+    def setUp(self):
+        self.student = make_student(1)
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        self.semester = Semester.objects.create(season="F", year=2023)
+        lecture_time = LectureTime.objects.create(start_time="09:00")
+        self.courses = []
+        for unites in (2, 4):
+            course = Course.objects.create(name="c", code="C", teacher=teacher)
+            Lecture.objects.create(
+                course=course, unites=unites, lecture_time=lecture_time
+            )
+            self.courses.append(course)
+        self.sem_result = SemesterResult.objects.create(
+            student=self.student, semester=self.semester
+        )
+
+    def add_result(self, course, degree):
+        return Result.objects.create(
+            course=course,
+            student=self.student,
+            semester=self.semester,
+            work_degree=0,
+            semifinal_degree=0,
+            final_degree=degree,
+        )
+
+    def assertAggregates(self, count, total, gpa):
+        self.sem_result.refresh_from_db()
+        self.assertEqual(self.sem_result.subjects_count, count)
+        self.assertEqual(self.sem_result.total_degree, total)
+        self.assertEqual(self.sem_result.gpa, gpa)
+
+    def test_incremental_updates(self):
+        first = self.add_result(self.courses[0], 60)
+        self.add_result(self.courses[1], 90)
+        self.assertAggregates(2, 150, 80.0)
+        first = Result.objects.get(pk=first.pk)
+        first.final_degree = 90
+        first.save()
+        self.assertAggregates(2, 180, 90.0)
+        first.delete()
+        self.assertAggregates(1, 90, 90.0)
+
+    def test_existing_results_counted_on_create_and_rebuild(self):
+        self.add_result(self.courses[0], 50)
+        self.sem_result.delete()
+        self.add_result(self.courses[1], 80)
+        self.sem_result = SemesterResult.objects.create(
+            student=self.student, semester=self.semester
+        )
+        self.assertAggregates(2, 130, 70.0)
+        SemesterResult.objects.update(total_degree=0, subjects_count=0)
+        call_command("rebuild_semester_results", stdout=io.StringIO())
+        self.assertAggregates(2, 130, 70.0)
+
+    def test_lecture_units_change(self):
+        self.add_result(self.courses[0], 60)
+        self.add_result(self.courses[1], 90)
+        Lecture.objects.filter(course=self.courses[1]).delete()
+        self.assertAggregates(2, 150, 60.0)
+
+    def test_lecture_moved_between_courses(self):
+        self.add_result(self.courses[0], 60)
+        lecture = Lecture.objects.get(course=self.courses[0])
+        lecture.course = self.courses[1]
+        lecture.save()
+        self.sem_result.refresh_from_db()
+        self.assertEqual(self.sem_result.total_unites, 0)
+        self.assertEqual(self.sem_result.weighted_degree, 0)
+
+    def test_deferred_fields(self):
+        first = self.add_result(self.courses[0], 60)
+        self.add_result(self.courses[1], 90)
+        self.assertEqual(len(Result.objects.only("id")), 2)
+        first.refresh_from_db(fields=["total_degree"])
+
+        deferred = Result.objects.defer("total_degree", "course").get(pk=first.pk)
+        deferred.final_degree = 90
+        deferred.save()
+        self.assertAggregates(2, 180, 90.0)
+        Result.objects.only("id").get(pk=first.pk).delete()
+        self.assertAggregates(1, 90, 90.0)
+
+
+class TranscriptTests(TestCase):
+    def setUp(self):
+        use_temp_shared_cache(self)
+        self.student = make_student(1)
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        self.course = Course.objects.create(name="Maths", code="M1", teacher=teacher)
+        self.fall = Semester.objects.create(season="F", year=2023)
+        self.spring = Semester.objects.create(season="S", year=2023)
+        SemesterResult.objects.create(student=self.student, semester=self.fall)
+        for semester in (self.fall, self.spring):
+            self.result = Result.objects.create(
+                course=self.course,
+                student=self.student,
+                semester=semester,
+                work_degree=10,
+                semifinal_degree=20,
+                final_degree=30,
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_transcript_is_one_query_then_cached(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/student/transcript/")
+        semesters = response.data["semesters"]
+        self.assertEqual([item["season"] for item in semesters], ["S", "F"])
+        self.assertIsNone(semesters[0]["total_degree"])
+        self.assertEqual(semesters[1]["total_degree"], 60)
+        self.assertEqual(semesters[1]["results"][0]["course_name"], "Maths")
+        with self.assertNumQueries(0):
+            self.client.get("/student/transcript/")
+
+    def test_result_change_invalidates(self):
+        self.client.get("/student/transcript/")
+        self.result.final_degree = 0
+        self.result.save()
+        response = self.client.get("/student/transcript/")
+        result = response.data["semesters"][0]["results"][0]
+        self.assertEqual(result["total_degree"], 30)
+
+    def fall_gpa(self):
+        return self.client.get("/student/transcript/").data["semesters"][1]["gpa"]
+
+    def test_lecture_change_invalidates_gpa(self):
+        self.assertIsNone(self.fall_gpa())
+        Lecture.objects.create(
+            course=self.course,
+            unites=2,
+            lecture_time=LectureTime.objects.create(start_time="09:00"),
+        )
+        self.assertEqual(self.fall_gpa(), 60.0)
+
+    def test_publish_warms_cache(self):
+        call_command("publish_results", str(self.fall.pk), stdout=io.StringIO())
+        with self.assertNumQueries(0):
+            response = self.client.get("/student/transcript/")
+        self.assertEqual(len(response.data["semesters"]), 2)
+
+    def test_publish_in_another_process_warms_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # the test database, uncommitted rows included
+            database = os.path.join(directory, "db.sqlite3")
+            with open(database, "wb") as target:
+                target.write(connection.connection.serialize())
+            manage_in_another_process(
+                "publish_results", str(self.fall.pk), database=database
+            )
+        with self.assertNumQueries(0):
+            response = self.client.get("/student/transcript/")
+        self.assertEqual(len(response.data["semesters"]), 2)
+
+    def test_result_change_in_another_process_invalidates(self):
+        self.client.get("/student/transcript/")
+        # the UPDATE another worker commits, and its transcript_changed receiver
+        Result.objects.filter(pk=self.result.pk).update(final_degree=0)
+        run_in_another_process(
+            "from api.cache import invalidate_transcript; invalidate_transcript(1)"
+        )
+        response = self.client.get("/student/transcript/")
+        result = response.data["semesters"][0]["results"][0]
+        self.assertEqual(result["final_degree"], 0)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        for serial_number in range(1, 6):
+            make_student(serial_number, arabic_first_name="أحمد")
+        self.client = APIClient()
+        self.client.force_authenticate(Student.objects.create_superuser(1000, "x"))
+
+    def export(self, name, **params):
+        response = self.client.get(f"/export/{name}/", params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_csv_projection(self):
+        body = self.export("students", fields="serial_number,arabic_first_name")
+        lines = body.decode().splitlines()
+        self.assertEqual(lines[0], "serial_number,arabic_first_name")
+        self.assertEqual(lines[1], "1,أحمد")
+        self.assertEqual(len(lines), 7)
+
+    def test_ndjson_in_chunks(self):
+        with mock.patch("students.exports.CHUNK_SIZE", 2):
+            body = self.export("students", output="ndjson")
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        serials = [row["serial_number"] for row in rows]
+        self.assertEqual(serials, [1, 2, 3, 4, 5, 1000])
+        self.assertNotIn("password", rows[0])
+
+    def test_gzip(self):
+        response = self.client.get(
+            "/export/enrollments/", HTTP_ACCEPT_ENCODING="gzip, deflate"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        body = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(body.decode(), "id,student,course,date_enrolled\r\n")
+
+    def test_errors(self):
+        self.assertEqual(self.client.get("/export/nope/").status_code, 404)
+        response = self.client.get("/export/students/", {"fields": "password"})
+        self.assertEqual(response.status_code, 400)
+        self.client.force_authenticate(Student.objects.get(pk=1))
+        self.assertEqual(self.client.get("/export/students/").status_code, 403)
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile(suffix=".csv.gz") as target:
+            call_command("export_data", "students", "--gzip", "-o", target.name)
+            lines = gzip.decompress(target.read()).decode().splitlines()
+        self.assertEqual(len(lines), 7)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        use_temp_shared_cache(self)
+        self.teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        Course.objects.create(name="c", code="C", teacher=self.teacher)
+        self.client = APIClient()
+        self.client.force_authenticate(make_student(1))
+
+    def test_not_modified_until_catalog_changes(self):
+        response = self.client.get("/courses/")
+        etag = response["ETag"]
+        self.assertTrue(response.has_header("Last-Modified"))
+        with self.assertNumQueries(0):
+            response = self.client.get("/courses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertNotEqual(self.client.get("/courses/?page_size=1")["ETag"], etag)
+        Course.objects.create(name="d", code="D", teacher=self.teacher)
+        response = self.client.get("/courses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_stamps_are_shared_between_processes(self):
+        etag = self.client.get("/courses/")["ETag"]
+        bump_version_in_another_process("course")
+        response = self.client.get("/courses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_enrollment_changes_course_version(self):
+        etag = self.client.get("/courses/")["ETag"]
+        course = Course.objects.get()
+        self.client.post("/enroll/bulk/", {"courses": [course.pk]}, format="json")
+        response = self.client.get("/courses/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data["results"][0]["students_count"], 1)
+
+    def test_semester_roster_changes_version(self):
+        semester = Semester.objects.create(season="F", year=2023)
+        etag = self.client.get("/semester/")["ETag"]
+        semester.students.add(Student.objects.get())
+        response = self.client.get("/semester/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        use_temp_shared_cache(self)
+        response_cache.clear()
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        lecture_time = LectureTime.objects.create(start_time="09:00")
+        self.courses = [
+            Course.objects.create(name=name, code=name, teacher=teacher)
+            for name in ("a", "b")
+        ]
+        self.lectures = [
+            Lecture.objects.create(course=course, unites=2, lecture_time=lecture_time)
+            for course in self.courses
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(Student.objects.create_superuser(1, "x"))
+
+    def lectures_of(self, course):
+        return self.client.get("/lectures/", {"course": course.pk})
+
+    def test_hits_skip_the_database(self):
+        self.lectures_of(self.courses[0])
+        with self.assertNumQueries(0):
+            response = self.lectures_of(self.courses[0])
+        self.assertEqual(len(response.data["results"]), 1)
+        stats = self.client.get("/cache-stats/").data["lecture"]
+        self.assertGreaterEqual(stats["hits"], 1)
+
+    def test_lecture_change_evicts_only_its_course(self):
+        self.lectures_of(self.courses[0])
+        self.lectures_of(self.courses[1])
+        self.lectures[0].title = "renamed"
+        self.lectures[0].save()
+        with self.assertNumQueries(0):
+            self.lectures_of(self.courses[1])
+        response = self.lectures_of(self.courses[0])
+        self.assertEqual(response.data["results"][0]["title"], "renamed")
+
+    def test_other_process_change_evicts(self):
+        self.lectures_of(self.courses[0])
+        bump_version_in_another_process(f"lecture:{self.courses[0].pk}")
+        with self.assertNumQueries(1):
+            self.lectures_of(self.courses[0])
+
+    def test_hosts_are_cached_apart(self):
+        # the next links are absolute, built from the Host header
+        for host in ("uni.example", "evil.example"):
+            response = self.client.get("/courses/", {"page_size": 1}, HTTP_HOST=host)
+            self.assertTrue(response.data["next"].startswith(f"http://{host}/"))
+
+    def test_moving_a_lecture_evicts_both_courses(self):
+        self.lectures_of(self.courses[0])
+        lecture = Lecture.objects.get(pk=self.lectures[0].pk)
+        lecture.course = self.courses[1]
+        lecture.save()
+        self.assertEqual(self.lectures_of(self.courses[0]).data["results"], [])
+
+
+class TimetableTests(TestCase):
+    def setUp(self):
+        self.student = make_student(1)
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        monday_nine = LectureTime.objects.create(start_time="09:00", day="MO")
+        monday_nine_again = LectureTime.objects.create(start_time="09:00", day="MO")
+        sunday_ten = LectureTime.objects.create(start_time="10:00", day="SU")
+        self.courses = {}
+        for code, lecture_time in (
+            ("A", monday_nine),
+            ("B", monday_nine_again),
+            ("C", sunday_ten),
+            ("D", sunday_ten),
+        ):
+            course = Course.objects.create(name=code, code=code, teacher=teacher)
+            Lecture.objects.create(course=course, unites=2, lecture_time=lecture_time)
+            self.courses[code] = course
+        Enrollment.objects.create(student=self.student, course=self.courses["A"])
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_timetable_grid(self):
+        with self.assertNumQueries(1):
+            response = self.client.get("/student/timetable/")
+        self.assertEqual(response.data["MO"]["09:00"][0]["course_code"], "A")
+        self.assertEqual(response.data["SU"]["10:00"], [])
+        self.assertEqual(len(response.data), 7)
+
+    def test_single_enroll_rejects_clash(self):
+        response = self.client.post(
+            "/enroll/", {"student": 1, "course": self.courses["B"].pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            "/enroll/", {"student": 1, "course": self.courses["C"].pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+
+    def test_bulk_enroll_rejects_clashes(self):
+        ids = [self.courses[code].pk for code in ("B", "C", "D")]
+        response = self.client.post("/enroll/bulk/", {"courses": ids}, format="json")
+        self.assertEqual(
+            [item["status"] for item in response.data],
+            ["clash", "enrolled", "clash"],
+        )
+
+
+class AsyncStudentEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        auth_cache.clear()
+        use_temp_shared_cache(self)
+        self.student = make_student(1)
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        lecture_time = LectureTime.objects.create(start_time="09:00", day="MO")
+        semester = Semester.objects.create(season="F", year=2023)
+        for index in range(3):
+            course = Course.objects.create(
+                name=f"course{index}", code=f"C{index}", teacher=teacher
+            )
+            Lecture.objects.create(course=course, unites=2, lecture_time=lecture_time)
+            Enrollment.objects.create(student=self.student, course=course)
+            Result.objects.create(
+                student=self.student,
+                course=course,
+                semester=semester,
+                work_degree=20,
+                semifinal_degree=20,
+                final_degree=30,
+                total_degree=70,
+            )
+        _, token = AuthToken.objects.create(self.student)
+        self.headers = {"Authorization": f"Token {token}"}
+
+    async def test_matches_sync_endpoints(self):
+        for path in (
+            "student/main/",
+            "student/secondary/",
+            "student/timetable/",
+            "results/?page_size=2",
+            "enrollment/?expand=course",
+        ):
+            with self.subTest(path=path):
+                expected = await self.async_client.get(f"/{path}", headers=self.headers)
+                response = await self.async_client.get(
+                    f"/async/{path}", headers=self.headers
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.content,
+                    expected.content.replace(b"/results/", b"/async/results/"),
+                )
+
+    async def test_rejects_bad_requests(self):
+        response = await self.async_client.get("/async/results/")
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            "/async/results/", headers={"Authorization": "Token nope"}
+        )
+        self.assertEqual(response.status_code, 401)
+        response = await self.async_client.get(
+            "/async/results/?semester=x", headers=self.headers
+        )
+        self.assertEqual(response.status_code, 400)
+        response = await self.async_client.post(
+            "/async/results/", headers=self.headers
+        )
+        self.assertEqual(response.status_code, 405)
+
+    async def test_logout_invalidates(self):
+        path = "/async/student/main/"
+        response = await self.async_client.get(path, headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        await AuthToken.objects.filter(user=self.student).adelete()
+        response = await self.async_client.get(path, headers=self.headers)
+        self.assertEqual(response.status_code, 401)
+
+
+class CourseCapacityTests(TestCase):
+    def setUp(self):
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        self.course = Course.objects.create(
+            name="c", code="C", teacher=teacher, capacity=2
+        )
+        self.students = [make_student(serial_number) for serial_number in (1, 2, 3)]
+
+    def test_counts_and_rejects_when_full(self):
+        for student in self.students[:2]:
+            Enrollment.objects.create(student=student, course=self.course)
+        with self.assertRaises(CourseFull):
+            Enrollment.objects.create(student=self.students[2], course=self.course)
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 2)
+        self.assertEqual(Enrollment.objects.count(), 2)
+        Enrollment.objects.filter(student=self.students[0]).delete()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.enrolled_count, 1)
+
+    def test_saving_a_stale_course_keeps_the_count(self):
+        # as the admin change form saves the copy it loaded
+        stale = Course.objects.get(pk=self.course.pk)
+        for student in self.students[:2]:
+            Enrollment.objects.create(student=student, course=self.course)
+        stale.name = "renamed"
+        stale.save()
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.name, "renamed")
+        self.assertEqual(self.course.enrolled_count, 2)
+        with self.assertRaises(CourseFull):
+            Enrollment.objects.create(student=self.students[2], course=self.course)
+
+    def test_moving_an_enrollment_moves_its_seat(self):
+        other = Course.objects.create(
+            name="o", code="O", teacher=self.course.teacher, capacity=1
+        )
+        enrollment = Enrollment.objects.create(
+            student=self.students[0], course=self.course
+        )
+        enrollment.course = other
+        enrollment.save()
+        self.assertEqual(
+            dict(Course.objects.values_list("pk", "enrolled_count")),
+            {self.course.pk: 0, other.pk: 1},
+        )
+        enrollment = Enrollment.objects.create(
+            student=self.students[1], course=self.course
+        )
+        enrollment.course = other
+        with self.assertRaises(CourseFull):
+            enrollment.save()
+        self.assertEqual(
+            Enrollment.objects.get(pk=enrollment.pk).course_id, self.course.pk
+        )
+
+    def test_bulk_enroll_reports_full(self):
+        Enrollment.objects.create(student=self.students[0], course=self.course)
+        Enrollment.objects.create(student=self.students[1], course=self.course)
+        client = APIClient()
+        client.force_authenticate(self.students[2])
+        response = client.post(
+            "/enroll/bulk/", {"courses": [self.course.pk]}, format="json"
+        )
+        self.assertEqual(
+            response.data, [{"course": self.course.pk, "status": "full"}]
+        )
+
+
+class ConcurrentEnrollmentTests(TransactionTestCase):
+    """Many threads race for the seats of one course."""
+
+    THREADS = 8
+    STUDENTS = 40
+    CAPACITY = 15
+
+    def test_course_is_never_oversubscribed(self):
+        teacher = Teacher.objects.create(
+            first_name="T", last_name="T", email="t@example.com"
+        )
+        course = Course.objects.create(
+            name="c", code="C", teacher=teacher, capacity=self.CAPACITY
+        )
+        Student.objects.bulk_create(
+            Student(serial_number=serial_number, password="!")
+            for serial_number in range(1, self.STUDENTS + 1)
+        )
+        serial_numbers = queue.Queue()
+        for serial_number in range(1, self.STUDENTS + 1):
+            serial_numbers.put(serial_number)
+        outcomes = queue.Queue()
+
+        def enroll():
+            try:
+                while True:
+                    try:
+                        serial_number = serial_numbers.get_nowait()
+                    except queue.Empty:
+                        return
+                    while True:
+                        try:
+                            Enrollment.objects.create(
+                                student_id=serial_number, course=course
+                            )
+                            outcomes.put("enrolled")
+                        except CourseFull:
+                            outcomes.put("full")
+                        except OperationalError:
+                            # the shared in-memory test database has no busy wait
+                            time.sleep(0.001)
+                            continue
+                        break
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=enroll) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        results = [outcomes.get() for _ in range(outcomes.qsize())]
+        course.refresh_from_db()
+        self.assertEqual(results.count("enrolled"), self.CAPACITY)
+        self.assertEqual(results.count("full"), self.STUDENTS - self.CAPACITY)
+        self.assertEqual(course.enrolled_count, self.CAPACITY)
+        self.assertEqual(Enrollment.objects.count(), self.CAPACITY)
@@ -0,0 +1,85 @@
+"""
+Weekly timetables and lecture time clashes.
+
+Both walk ``Enrollment -> Course -> Lecture -> LectureTime`` through the
+``(student, course)`` index on Enrollment and the ``(course, lecture_time)``
+index on Lecture. Two lectures clash when their lecture times share a day
+and start time.
+"""
+from django.db.models import Exists, OuterRef
+from .models import Lecture, LectureTime
+
+
+def timetable_lectures(student):
+    """The student's lectures in timetable order, as ``values()`` rows."""
+    return (
+        Lecture.objects.filter(course__enrollment__student=student)
+        .order_by("lecture_time__day", "lecture_time__start_time", "course", "id")
+        .values(
+            "id",
+            "title",
+            "unites",
+            "course",
+            "course__name",
+            "course__code",
+            "lecture_time__day",
+            "lecture_time__start_time",
+        )
+    )
+
+
+def build_timetable(lectures):
+    """Arrange ``timetable_lectures`` rows as ``{day: {start_time: [lectures]}}``."""
+    grid = {
+        day: {start_time: [] for start_time, _ in LectureTime.LECTURE_TIMES}
+        for day, _ in LectureTime.DAY_CHOICES
+    }
+    for lecture in lectures:
+        grid[lecture["lecture_time__day"]][lecture["lecture_time__start_time"]].append(
+            {
+                "lecture": lecture["id"],
+                "title": lecture["title"],
+                "unites": lecture["unites"],
+                "course": lecture["course"],
+                "course_name": lecture["course__name"],
+                "course_code": lecture["course__code"],
+            }
+        )
+    return grid
+
+
+def timetable(student):
+    """Return the student's week as ``{day: {start_time: [lectures]}}``."""
+    return build_timetable(timetable_lectures(student))
+
+
+async def atimetable(student):
+    """Async ``timetable``."""
+    return build_timetable([lecture async for lecture in timetable_lectures(student)])
+
+
+def clashing_courses(student, course_ids):
+    """
+    Return the ids in ``course_ids`` with a lecture at the same day and start
+    time as a lecture of one of the student's current courses.
+    """
+    enrolled = Lecture.objects.filter(
+        course__enrollment__student=student,
+        lecture_time__day=OuterRef("lecture_time__day"),
+        lecture_time__start_time=OuterRef("lecture_time__start_time"),
+    )
+    return set(
+        Lecture.objects.filter(course__in=course_ids)
+        .filter(Exists(enrolled))
+        .values_list("course", flat=True)
+    )
+
+
+def course_slots(course_ids):
+    """Map each course id to the ``(day, start_time)`` slots of its lectures."""
+    slots = {course_id: set() for course_id in course_ids}
+    for course_id, day, start_time in Lecture.objects.filter(
+        course__in=course_ids
+    ).values_list("course", "lecture_time__day", "lecture_time__start_time"):
+        slots[course_id].add((day, start_time))
+    return slots